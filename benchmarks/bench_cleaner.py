@@ -0,0 +1,70 @@
+"""
+Micro-benchmark of full_clean_pipeline against the original multi-pass pipeline.
+
+Each fixture in benchmarks/fixtures/cleaner is repeated up to the target size,
+checked for identical output under both pipelines, and timed.
+
+Usage:
+    python benchmarks/bench_cleaner.py [--size 100000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from paper_writer.utils.cleaner import full_clean_pipeline, reference_clean_pipeline
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures' / 'cleaner'
+
+
+def load_corpus(size: int) -> dict:
+    """Load each fixture and repeat it up to roughly `size` characters."""
+    corpus = {}
+    for path in sorted(FIXTURES_DIR.iterdir()):
+        text = path.read_text(encoding='utf-8')
+        corpus[path.name] = (text + '\n') * max(1, size // (len(text) + 1))
+    return corpus
+
+
+def best_time(func, text: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000, help='Characters per document')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions, best is reported')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.size)
+
+    mismatches = [
+        name for name, text in corpus.items()
+        if full_clean_pipeline(text) != reference_clean_pipeline(text)
+    ]
+    if mismatches:
+        print(f"Output differs from the reference pipeline for: {', '.join(mismatches)}")
+        return 1
+
+    print(f"{'fixture':<24}{'chars':>9}{'reference ms':>15}{'fused ms':>11}{'speedup':>9}")
+    total_reference = total_fused = 0.0
+    for name, text in corpus.items():
+        reference = best_time(reference_clean_pipeline, text, args.repeat)
+        fused = best_time(full_clean_pipeline, text, args.repeat)
+        total_reference += reference
+        total_fused += fused
+        print(f"{name:<24}{len(text):>9}{reference * 1000:>15.2f}{fused * 1000:>11.2f}{reference / fused:>8.1f}x")
+    print(f"{'total':<24}{'':>9}{total_reference * 1000:>15.2f}{total_fused * 1000:>11.2f}"
+          f"{total_reference / total_fused:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
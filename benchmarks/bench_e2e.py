@@ -0,0 +1,164 @@
+"""
+Offline end-to-end benchmark of the Description -> Outline -> Searcher -> Crawler -> Writer chain.
+
+A local OpenAI-compatible stub stands in for the LLM provider and a fixture
+server stands in for the web (see benchmarks/servers.py), so results do not
+depend on the network. Both run in child processes, so the reported peak RSS
+is that of the pipeline alone. Response and crawl caches are disabled and
+crawled content is stored in a temporary directory.
+
+Usage:
+    python benchmarks/bench_e2e.py [--papers 8] [--concurrency 4] [--latency 0.2] [--latency-jitter 0]
+                                   [--token-rate 200] [--batch-search] [--overlap]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from servers import serve_fixtures, serve_llm  # noqa: E402
+
+from paper_writer.pipeline import (  # noqa: E402
+    CrawlerComponent, DescriptionGenerator, OutlineGenerator, PaperBase, SearcherGenerator, SectionWriter
+)
+from paper_writer.utils.content_store import ContentStore  # noqa: E402
+from paper_writer.utils.crawler import CrawlEngine  # noqa: E402
+from paper_writer.utils.metrics import metrics  # noqa: E402
+from paper_writer.utils.model import load_models  # noqa: E402
+
+API_KEY_ENV = 'PAPER_WRITER_BENCH_API_KEY'
+
+
+def start_server(target, *args) -> int:
+    """Start a server in a daemon child process and return its port."""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=target, args=(port_queue, *args), daemon=True)
+    process.start()
+    return port_queue.get(timeout=30)
+
+
+def write_models_config(path: str, base_url: str) -> None:
+    model = {'base_url': base_url, 'model_api_key': API_KEY_ENV, 'cache': False}
+    config = {
+        'search_model': {'model_name': 'stub/search', **model},
+        'simple_model': {'model_name': 'stub/simple', **model},
+        'complex_model': {'model_name': 'stub/complex', **model},
+    }
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--papers', type=int, default=8, help='Number of papers to run')
+    parser.add_argument('--concurrency', type=int, default=4, help='Papers in flight at once')
+    parser.add_argument('--latency', type=float, default=0.2, help='LLM first token latency in seconds')
+    parser.add_argument('--latency-jitter', type=float, default=0.0,
+                        help='Extra LLM latency in seconds, up to this much per request')
+    parser.add_argument('--token-rate', type=float, default=200, help='LLM tokens per second, 0 for no limit')
+    parser.add_argument('--sections', type=int, default=6, help='Sections in each outline')
+    parser.add_argument('--urls-per-section', type=int, default=4, help='Search results per section')
+    parser.add_argument('--batch-search', action='store_true', help='Search for all sections in one request')
+    parser.add_argument('--overlap', action='store_true', help='Crawl the results of each section search right away')
+    args = parser.parse_args()
+
+    fixture_port = start_server(serve_fixtures)
+    llm_port = start_server(
+        serve_llm, args.latency, args.token_rate, args.sections, args.urls_per_section,
+        f"http://127.0.0.1:{fixture_port}", args.latency_jitter
+    )
+
+    os.environ[API_KEY_ENV] = 'benchmark'
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_path = os.path.join(tmp_dir, 'models.yaml')
+        write_models_config(config_path, f"http://127.0.0.1:{llm_port}")
+        models = load_models(config_path)
+
+    crawl_engine = CrawlEngine(use_cache=False, use_parser_pool=True)
+    # 在解释器退出时删除
+    content_dir = tempfile.TemporaryDirectory()
+    content_store = ContentStore(content_dir.name)
+    components = [
+        DescriptionGenerator(models=models),
+        OutlineGenerator(models=models),
+        SearcherGenerator(
+            crawl_engine=crawl_engine, models=models, batch_sections=args.batch_search,
+            content_store=content_store, overlap_stages=args.overlap
+        ),
+        CrawlerComponent(crawl_engine=crawl_engine, content_store=content_store),
+        SectionWriter(models=models, content_store=content_store),
+    ]
+
+    def run_paper(index: int) -> PaperBase:
+        paper = PaperBase(
+            title=f"Benchmark paper {index}: a survey of coverage path planning",
+            description="Survey of coverage path planning algorithms for mobile robots."
+        )
+        for component in components:
+            paper = component(paper)
+        return paper
+
+    metrics.enable()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        papers = list(executor.map(run_paper, range(args.papers)))
+    elapsed = time.perf_counter() - start
+
+    incomplete = [
+        i for i, paper in enumerate(papers)
+        if not paper.citations or not paper.citation_content or not paper.citation_sentence
+    ]
+    if incomplete:
+        print(f"Papers without citations, crawled content or cited sentences: {incomplete}")
+        return 1
+
+    stage_durations: Dict[str, List[float]] = defaultdict(list)
+    for span in metrics.spans():
+        if span['name'] == 'stage':
+            stage_durations[span['labels']['stage']].append(span['duration'])
+
+    print(f"papers: {args.papers}  concurrency: {args.concurrency}  "
+          f"latency: {args.latency}s (+{args.latency_jitter}s)  token rate: {args.token_rate}/s  "
+          f"batch search: {args.batch_search}  overlap: {args.overlap}")
+    print(f"elapsed: {elapsed:.2f}s  throughput: {args.papers / elapsed * 60:.1f} papers/min")
+    print(f"{'stage':<24}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for component in components:
+        durations = stage_durations[component.name]
+        print(f"{component.name:<24}" + ''.join(
+            f"{percentile(durations, q) * 1000:>10.1f}" for q in (50, 90, 99, 100)
+        ))
+
+    counters = metrics.counters()
+    for name in ('llm_calls', 'llm_prompt_tokens', 'llm_completion_tokens', 'crawl_bytes',
+                 'near_duplicates', 'pruned_sources', 'section_sources'):
+        print(f"{name}: {int(sum(counters.get(name, {}).values()))}")
+    clean_cpu = sum(span['cpu'] for span in metrics.spans() if span['name'] == 'clean')
+    print(f"parse cpu: {sum(counters.get('parse_cpu_seconds', {}).values()):.2f}s  clean cpu: {clean_cpu:.2f}s")
+    # ru_maxrss 在 Linux 上以 KB 为单位，在 macOS 上以字节为单位
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+    print(f"peak RSS: {peak_rss_mb:.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark of HTML-to-markdown conversion on publisher pages.
+
+Each page in benchmarks/fixtures/publishers is converted by the original path,
+which parses with html.parser, serializes the soup and lets markdownify parse
+it again, and by the single-parse main-content path with each available
+parser. Parse time and markdown size are reported, and the main-content
+output is checked to keep the article text and drop the page chrome.
+
+Usage:
+    python benchmarks/bench_extract.py [--repeat 20]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from paper_writer.utils.citation import extract_html_metadata  # noqa: E402
+from paper_writer.utils.html_extract import HTML_PARSER, html_to_markdown, parse_html  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures' / 'publishers'
+
+# 每个页面正文中必须保留的句子和页面模板中必须删除的句子
+EXPECTED: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    'arxiv_abs.html': (('Field experiments with four ground robots',), 'Advanced Search'),
+    'blog_post.html': (('a final edge pass after its systematic sweep',), 'Great explanation!'),
+    'cnki_detail.html': (('重复覆盖率降低了42.6%',), '客服热线'),
+    'journal_article.html': (('extending the area covered per battery',), 'Accept all cookies'),
+    # 章节的 id 和 class 含有 related、social、comments 等词，不能当作页面模板删除
+    'sectioned_article.html': (
+        (
+            'ignore the energy spent on turns',
+            'treats crowded cells as temporarily blocked',
+            'keeps the team balanced without central coordination',
+            'measure turning energy on their own terrain',
+        ),
+        'We use cookies',
+    ),
+    'wiki_article.html': (('critical points of a Morse function',), 'Random article'),
+}
+
+
+def convert_reference(body: bytes) -> str:
+    """The original path: parse for metadata, serialize, and parse again in markdownify."""
+    from bs4 import BeautifulSoup
+    from markdownify import markdownify as md
+
+    soup = BeautifulSoup(body, 'html.parser')
+    extract_html_metadata(soup)
+    return md(str(soup))
+
+
+def make_converter(parser: str) -> Callable[[bytes], str]:
+    def convert(body: bytes) -> str:
+        soup = parse_html(body, parser=parser)
+        extract_html_metadata(soup)
+        return html_to_markdown(soup)
+    return convert
+
+
+def best_time(func: Callable[[bytes], str], body: bytes, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(body)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='Timing repetitions, best is reported')
+    args = parser.parse_args()
+
+    converters = {'original': convert_reference, 'html.parser': make_converter('html.parser')}
+    if HTML_PARSER == 'lxml':
+        converters['lxml'] = make_converter('lxml')
+    else:
+        print("lxml is not installed, only html.parser is measured")
+    pages = {path.name: path.read_bytes() for path in sorted(FIXTURES_DIR.iterdir())}
+
+    failures = []
+    for name, body in pages.items():
+        keeps, drop = EXPECTED[name]
+        for label, convert in converters.items():
+            if label == 'original':
+                continue
+            markdown = convert(body)
+            for keep in keeps:
+                if keep not in markdown:
+                    failures.append(f"{name} ({label}): article text missing: {keep!r}")
+            if drop in markdown:
+                failures.append(f"{name} ({label}): page chrome kept: {drop!r}")
+    if failures:
+        print('\n'.join(failures))
+        return 1
+
+    header = f"{'page':<22}{'bytes':>8}" + ''.join(f"{label + ' ms':>16}{'chars':>8}" for label in converters)
+    print(header)
+    totals = {label: [0.0, 0] for label in converters}
+    for name, body in pages.items():
+        row = f"{name:<22}{len(body):>8}"
+        for label, convert in converters.items():
+            elapsed = best_time(convert, body, args.repeat)
+            chars = len(convert(body))
+            totals[label][0] += elapsed
+            totals[label][1] += chars
+            row += f"{elapsed * 1000:>16.2f}{chars:>8}"
+        print(row)
+    print(f"{'total':<22}{sum(len(body) for body in pages.values()):>8}"
+          + ''.join(f"{elapsed * 1000:>16.2f}{chars:>8}" for elapsed, chars in totals.values()))
+
+    reference_time, reference_chars = totals['original']
+    for label, (elapsed, chars) in totals.items():
+        if label != 'original':
+            print(f"{label}: {reference_time / elapsed:.2f}x faster, {chars / reference_chars:.0%} of the original output")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
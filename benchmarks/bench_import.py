@@ -0,0 +1,78 @@
+"""
+Startup benchmark: how long importing each entry point takes in a fresh interpreter.
+
+Every run starts a new Python process with -X importtime, so nothing is shared
+with earlier runs except the OS file cache. Reports the median wall time per
+entry point and the modules with the largest cumulative import time.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 5] [--top 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).parent.parent
+
+ENTRY_POINTS = {
+    'cli': 'import main',
+    'description only': 'from paper_writer.pipeline.description import DescriptionGenerator',
+    'pipeline': 'import paper_writer.pipeline',
+    'crawl and clean': 'import paper_writer.utils.crawler; import paper_writer.utils.cleaner; '
+                       'import bs4, markdownify, pdfminer.high_level',
+}
+
+
+def import_once(statement: str) -> Tuple[float, Dict[str, int]]:
+    """Run statement in a fresh interpreter and return its wall time and the cumulative microseconds per module."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+
+    cumulative: Dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, total, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(total)
+    return elapsed, cumulative
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per entry point')
+    parser.add_argument('--top', type=int, default=10, help='Slowest modules listed per entry point')
+    args = parser.parse_args()
+
+    baseline = statistics.median(import_once('pass')[0] for _ in range(args.runs))
+    print(f"interpreter startup: {baseline * 1000:.1f} ms")
+
+    for label, statement in ENTRY_POINTS.items():
+        times: List[float] = []
+        modules: Dict[str, List[int]] = {}
+        for _ in range(args.runs):
+            elapsed, cumulative = import_once(statement)
+            times.append(elapsed)
+            for name, total in cumulative.items():
+                modules.setdefault(name, []).append(total)
+
+        median = statistics.median(times)
+        print(f"\n{label}: {median * 1000:.1f} ms ({(median - baseline) * 1000:.1f} ms over startup)")
+        slowest = sorted(modules.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+        for name, totals in slowest[:args.top]:
+            print(f"  {statistics.median(totals) / 1000:>8.1f} ms  {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark of page parsing in crawler threads against parsing in the ParserPool.
+
+A corpus of generated PDFs and the HTML fixtures is parsed and cleaned by a
+pool of threads, first in-process, where the work serializes on the GIL, then
+through worker processes. Both must give identical output.
+
+Usage:
+    python benchmarks/bench_parse.py [--documents 48] [--pages 20] [--threads 8] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from servers import FIXTURES_DIR, make_pdf  # noqa: E402
+
+from paper_writer.utils.cleaner import full_clean_pipeline  # noqa: E402
+from paper_writer.utils.crawler import parse_content  # noqa: E402
+from paper_writer.utils.parser_pool import ParserPool  # noqa: E402
+
+Document = Tuple[str, str, bytes]
+
+
+def build_corpus(documents: int, pages: int) -> List[Document]:
+    """Alternate generated PDFs with the HTML fixtures, each made unique by its number."""
+    paper_lines = (FIXTURES_DIR / 'paper.txt').read_text(encoding='utf-8').splitlines()
+    templates = [(FIXTURES_DIR / name).read_text(encoding='utf-8') for name in ('article.html', 'blog.html')]
+    corpus = []
+    for number in range(documents):
+        if number % 2 == 0:
+            body = make_pdf([[f"Document {number}, page {page + 1}"] + paper_lines for page in range(pages)])
+            corpus.append((f"http://bench/{number}/paper.pdf", 'application/pdf', body))
+        else:
+            html = templates[number // 2 % 2].replace('$id', str(number)).replace('$findings', '')
+            corpus.append((f"http://bench/{number}/page.html", 'text/html; charset=utf-8', html.encode('utf-8')))
+    return corpus
+
+
+def parse_in_thread(document: Document) -> str:
+    page = parse_content(*document)
+    return full_clean_pipeline(page.markdown)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--documents', type=int, default=48, help='Documents in the corpus, half of them PDFs')
+    parser.add_argument('--pages', type=int, default=20, help='Pages per PDF')
+    parser.add_argument('--threads', type=int, default=8, help='Crawler threads submitting documents')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parser processes')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.documents, args.pages)
+    size = sum(len(body) for _, _, body in corpus)
+    print(f"documents: {len(corpus)}  bytes: {size}  threads: {args.threads}  workers: {args.workers}  "
+          f"cpus: {os.cpu_count()}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        expected = list(executor.map(parse_in_thread, corpus))
+    in_thread = time.perf_counter() - start
+
+    pool = ParserPool(max_workers=args.workers)
+    # 预先启动工作进程，不把进程启动时间计入结果
+    list(ThreadPoolExecutor(max_workers=args.workers).map(lambda _: pool.clean('warm up'), range(args.workers)))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        actual = list(executor.map(lambda document: pool.parse(*document, clean=True).clean_text, corpus))
+    in_pool = time.perf_counter() - start
+    pool.shutdown()
+
+    if actual != expected:
+        print("Parser pool output differs from in-thread parsing")
+        return 1
+    for label, elapsed in (('in threads', in_thread), ('parser pool', in_pool)):
+        print(f"{label:<12} {elapsed:8.2f}s  {len(corpus) / elapsed:8.1f} docs/s")
+    print(f"speedup: {in_thread / in_pool:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
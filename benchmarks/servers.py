@@ -0,0 +1,280 @@
+"""
+Local stand-ins for the LLM provider and the web, used by the end-to-end benchmark.
+
+- LLM stub: an OpenAI-compatible /chat/completions endpoint that answers every
+  pipeline prompt with a canned response, streamed with a configurable first
+  token latency, latency jitter and token rate.
+- Fixture server: serves the HTML templates in benchmarks/fixtures/web and
+  PDFs generated from paper.txt. Pages of different ids are different
+  documents; the HTML, PDF and mirror pages of one id share its findings.
+"""
+import hashlib
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from typing import List
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures' / 'web'
+
+# 粗略估计：每个 token 约 4 个字符
+CHARS_PER_TOKEN = 4
+
+# 每个文档独有的 findings 段落的词数
+FINDINGS_WORDS = 600
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class LLMStubHandler(_Handler):
+    """OpenAI-compatible chat completions endpoint with canned responses."""
+
+    # Set on the handler subclass created by serve_llm
+    latency = 0.0
+    latency_jitter = 0.0
+    token_rate = 0.0
+    sections = 6
+    urls_per_section = 4
+    fixture_url = ''
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = request['messages'][-1]['content']
+        content = self._respond(prompt)
+        usage = {
+            'prompt_tokens': len(prompt) // CHARS_PER_TOKEN,
+            'completion_tokens': len(content) // CHARS_PER_TOKEN,
+        }
+
+        # 抖动由提示词决定，同一请求在多次运行中等待的时间相同
+        jitter = random.Random(prompt).uniform(0, self.latency_jitter) if self.latency_jitter > 0 else 0.0
+        time.sleep(self.latency + jitter)
+        if not request.get('stream'):
+            self._sleep_tokens(len(content))
+            body = {'choices': [{'message': {'role': 'assistant', 'content': content}}], 'usage': usage}
+            self._send(200, json.dumps(body).encode(), 'application/json')
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        step = CHARS_PER_TOKEN * 4
+        for start in range(0, len(content), step):
+            delta = content[start:start + step]
+            self._sleep_tokens(len(delta))
+            self._write_event({'choices': [{'index': 0, 'delta': {'content': delta}}]})
+        self._write_event({'choices': [], 'usage': usage})
+        self._write_chunk(b'data: [DONE]\n\n')
+        self._write_chunk(b'')
+
+    def _sleep_tokens(self, chars: int) -> None:
+        if self.token_rate > 0:
+            time.sleep(chars / CHARS_PER_TOKEN / self.token_rate)
+
+    def _write_event(self, event: dict) -> None:
+        self._write_chunk(b'data: ' + json.dumps(event).encode() + b'\n\n')
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def _respond(self, prompt: str) -> str:
+        if 'generate a comprehensive outline' in prompt:
+            return json.dumps({
+                f"Section {i}": f"1. Background of topic {i}.\n2. Methods of topic {i}.\n3. Open problems of topic {i}."
+                for i in range(1, self.sections + 1)
+            })
+        if 'suggest relevant academic references for each of the numbered sections' in prompt:
+            return self._batch_search_results(prompt)
+        if 'suggest relevant academic search results' in prompt:
+            return self._search_results(prompt)
+        if 'for each of the following papers' in prompt:
+            count = int(re.search(r'exactly (\d+) strings', prompt).group(1))
+            return json.dumps([self._citation(f"{prompt}-{i}") for i in range(count)], ensure_ascii=False)
+        if 'Please provide a reference' in prompt:
+            return self._citation(prompt)
+        if 'write one section of the paper' in prompt:
+            return self._section_text(prompt)
+        if 'comprehensive and detailed description' in prompt:
+            return (
+                "**Objectives and Scope** This paper surveys coverage path planning algorithms for mobile robots, "
+                "classifying them by methodology and comparing their completeness, efficiency and robustness. "
+                * 8
+            )
+        return "OK"
+
+    def _search_results(self, prompt: str) -> str:
+        urls = self._section_urls(prompt)
+        lines = [f"{n}. Relevant result: {url}" for n, url in enumerate(urls, start=1)]
+        return '\n'.join(lines) + '\n\nCitations: ' + ', '.join(urls)
+
+    def _batch_search_results(self, prompt: str) -> str:
+        # 一半结果直接写出 URL，另一半用 [n] 标记指向 citations 字段
+        sections = re.split(r'^\[\d+\]\n', prompt.split('Sections:', 1)[1], flags=re.MULTILINE)[1:]
+        results = {}
+        citations: List[str] = []
+        for number, section in enumerate(sections, start=1):
+            entries = []
+            for i, url in enumerate(self._section_urls(section)):
+                if i % 2:
+                    citations.append(url)
+                    entries.append(f"Relevant result {i + 1} [{len(citations)}]")
+                else:
+                    entries.append(f"Relevant result {i + 1}, {url}")
+            results[str(number)] = entries
+        return json.dumps(results) + '\n\nCitations: ' + ', '.join(citations)
+
+    def _section_text(self, prompt: str) -> str:
+        # 每段引用提示词中的一个来源，没有来源时不带引用标记
+        sources = len(re.findall(r'^\[\d+\] ', prompt.split('Sources:', 1)[1], flags=re.MULTILINE))
+        paragraphs = []
+        for i in range(max(1, min(sources, 4))):
+            marker = f" [{i + 1}]" if sources else ""
+            paragraphs.append(
+                "Coverage path planning methods differ in how they decompose the free space and order the "
+                f"resulting cells{marker}. Their completeness and path length depend on the environment model. "
+                "Recent work combines classical decompositions with learned heuristics to handle dynamic obstacles."
+            )
+        return '\n\n'.join(paragraphs)
+
+    def _section_urls(self, section: str) -> List[str]:
+        # 同一章节总是得到同样的 URL，不同章节之间有少量重叠，以覆盖 URL 去重
+        seed = int(hashlib.sha256(section.encode('utf-8')).hexdigest()[:8], 16)
+        urls: List[str] = []
+        for i in range(self.urls_per_section):
+            if i % 4 == 3:
+                # 第四个结果是同一章节第一篇文章的镜像，覆盖近似重复检测
+                urls.append(f"{self.fixture_url}/{seed % 97}/mirror.html")
+                continue
+            page_id = (seed + i) % 97
+            kind = ('article.html', 'blog.html', 'paper.pdf')[i % 3]
+            urls.append(f"{self.fixture_url}/{page_id}/{kind}?utm_source=search")
+        return urls
+
+    def _citation(self, key: str) -> str:
+        # 与真实模型一样，引用由已清洗掉 URL 的文本生成，不含在线地址
+        digest = int(hashlib.sha256(key.encode('utf-8')).hexdigest()[:8], 16)
+        return (
+            f"SMITH J, DOE A. Stub reference {digest:08x}[J]. "
+            f"Journal of Field Robotics, {2000 + digest % 25}, {digest % 40 + 1}({digest % 6 + 1}): "
+            f"{digest % 900 + 1}-{digest % 900 + 15}."
+        )
+
+
+class FixtureHandler(_Handler):
+    """
+    Serve /<id>/article.html, /<id>/blog.html, /<id>/paper.pdf and /<id>/mirror.html
+    from the fixture templates. The mirror is article.html under different site chrome.
+    """
+
+    templates = {
+        name: Template((FIXTURES_DIR / name).read_text(encoding='utf-8'))
+        for name in ('article.html', 'blog.html')
+    }
+    paper_lines = (FIXTURES_DIR / 'paper.txt').read_text(encoding='utf-8').splitlines()
+    vocabulary = sorted(set(re.findall(r'[a-z]{3,}', ' '.join(paper_lines).lower())))
+
+    def do_GET(self):
+        match = re.match(r'^/(\d+)/([\w.]+)(?:\?.*)?$', self.path)
+        if match is None:
+            self._send(404, b'Not found', 'text/plain')
+            return
+        page_id, name = match.groups()
+        findings = self._findings(page_id)
+        if name in self.templates:
+            body = self.templates[name].substitute(id=page_id, findings=findings).encode('utf-8')
+            self._send(200, body, 'text/html; charset=utf-8')
+        elif name == 'mirror.html':
+            body = self.templates['article.html'].substitute(id=page_id, findings=findings)
+            body = re.sub(r'<nav>.*?</nav>', '<nav>Mirror | Search | Sign in | Download PDF</nav>', body, flags=re.DOTALL)
+            self._send(200, body.encode('utf-8'), 'text/html; charset=utf-8')
+        elif name == 'paper.pdf':
+            words = findings.split()
+            findings_lines = [' '.join(words[start:start + 12]) for start in range(0, len(words), 12)]
+            pages = [[f"Document {page_id}, page {page + 1}"] + self.paper_lines for page in range(8)]
+            pages[0] += findings_lines
+            self._send(200, make_pdf(pages), 'application/pdf')
+        else:
+            self._send(404, b'Not found', 'text/plain')
+
+    def _findings(self, page_id: str) -> str:
+        rng = random.Random(int(page_id))
+        return ' '.join(rng.choice(self.vocabulary) for _ in range(FINDINGS_WORDS)) + '.'
+
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """Build a minimal PDF with one Helvetica text block per page."""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>']
+    kids = ' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))
+    objects.append(f'<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>'.encode())
+    font_id = 3 + 2 * len(pages)
+    for i, lines in enumerate(pages):
+        text = ' '.join(f"({line.replace('(', '').replace(')', '')}) '" for line in lines)
+        stream = f'BT /F1 10 Tf 72 740 Td 14 TL {text} ET'.encode('latin-1', 'replace')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R '
+            f'/Resources << /Font << /F1 {font_id} 0 R >> >> >>'.encode()
+        )
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, obj)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def serve_llm(port_queue, latency: float, token_rate: float, sections: int,
+              urls_per_section: int, fixture_url: str, latency_jitter: float = 0.0) -> None:
+    """Run the LLM stub on a free port, reporting the port through port_queue."""
+    handler = type('ConfiguredLLMStubHandler', (LLMStubHandler,), {
+        'latency': latency,
+        'latency_jitter': latency_jitter,
+        'token_rate': token_rate,
+        'sections': sections,
+        'urls_per_section': urls_per_section,
+        'fixture_url': fixture_url,
+    })
+    _serve(handler, port_queue)
+
+
+def serve_fixtures(port_queue) -> None:
+    """Run the fixture server on a free port, reporting the port through port_queue."""
+    _serve(FixtureHandler, port_queue)
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 客户端关闭空闲的 keep-alive 连接时会出现连接重置，不需要打印
+        pass
+
+
+def _serve(handler, port_queue) -> None:
+    server = _QuietServer(('127.0.0.1', 0), handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
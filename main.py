@@ -1,6 +1,130 @@
+import argparse
+import json
+import sys
+from typing import List, Optional, Sequence
+
+from paper_writer.pipeline import (
+    BatchRunner, CrawlerComponent, DescriptionGenerator, OutlineGenerator, PaperBase, Pipeline, SearcherGenerator,
+    SectionWriter
+)
+from paper_writer.utils.crawler import CrawlEngine
+from paper_writer.utils.metrics import metrics
+from paper_writer.utils.model import load_models
+
+STAGES = ('description', 'outline', 'search', 'crawl', 'write')
+
+
+def build_pipeline(models_path: Optional[str], llm_concurrency: int, crawl_concurrency: int,
+                   stages: Sequence[str] = STAGES, batch_search: bool = False,
+                   overlap_stages: bool = False) -> Pipeline:
+    """Build one pipeline whose components share the model clients and the crawl engine."""
+    models = load_models(models_path, max_concurrency=llm_concurrency)
+    # 只在需要爬取的阶段创建爬虫引擎
+    crawl_engine = (
+        CrawlEngine(max_concurrency=crawl_concurrency, use_parser_pool=True)
+        if {'search', 'crawl'} & set(stages) else None
+    )
+    builders = {
+        'description': lambda: DescriptionGenerator(models=models),
+        'outline': lambda: OutlineGenerator(models=models),
+        'search': lambda: SearcherGenerator(
+            crawl_engine=crawl_engine, models=models, batch_sections=batch_search, overlap_stages=overlap_stages
+        ),
+        'crawl': lambda: CrawlerComponent(crawl_engine=crawl_engine),
+        'write': lambda: SectionWriter(models=models),
+    }
+    return Pipeline([builders[stage]() for stage in STAGES if stage in stages])
+
+
+def parse_stages(value: str) -> List[str]:
+    stages = [stage.strip() for stage in value.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown or not stages:
+        raise argparse.ArgumentTypeError(f"stages must be a comma separated subset of {', '.join(STAGES)}")
+    return stages
+
+
+def write_metrics(jsonl_path: Optional[str], prom_path: Optional[str]) -> None:
+    """Write the recorded metrics as JSON lines and in the Prometheus text format."""
+    if jsonl_path:
+        with open(jsonl_path, 'w', encoding='utf-8') as f:
+            metrics.write_jsonl(f)
+    if prom_path:
+        with open(prom_path, 'w', encoding='utf-8') as f:
+            f.write(metrics.to_prometheus())
+
+
 def main():
-    print("Hello from paper-writer!")
+    parser = argparse.ArgumentParser(description="Generate papers in bulk from a JSONL file of jobs.")
+    parser.add_argument('jobs', help='JSONL file, one {"title": ..., "description": ...} object per line')
+    parser.add_argument('-o', '--output', default='results.jsonl', help='JSONL file the results are appended to')
+    parser.add_argument('--concurrency', type=int, default=4, help='Papers in flight at once')
+    parser.add_argument('--llm-concurrency', type=int, default=16, help='LLM requests in flight across all papers')
+    parser.add_argument('--crawl-concurrency', type=int, default=16, help='Crawl requests in flight across all papers')
+    parser.add_argument('--models', default=None,
+                        help='Models configuration file (default: models.yaml in the project root)')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore existing stage checkpoints')
+    parser.add_argument('--stages', type=parse_stages, default=list(STAGES),
+                        help=f"Comma separated stages to run, in pipeline order (default: {','.join(STAGES)})")
+    parser.add_argument('--batch-search', action='store_true',
+                        help='Search for all sections of a paper in one request instead of one request per section')
+    parser.add_argument('--overlap-stages', action='store_true',
+                        help='Start crawling the results of each section search while other sections are searched')
+    parser.add_argument('--metrics-jsonl', metavar='PATH',
+                        help='Record metrics and write every span and counter to this JSONL file when the batch ends')
+    parser.add_argument('--metrics-prom', metavar='PATH',
+                        help='Record metrics and write them to this file in Prometheus text format when the batch ends')
+    args = parser.parse_args()
+    if args.metrics_jsonl or args.metrics_prom:
+        metrics.enable()
+
+    try:
+        failed = run_jobs(args)
+    finally:
+        # 中途中断时同样写出已记录的指标
+        write_metrics(args.metrics_jsonl, args.metrics_prom)
+    return 1 if failed else 0
+
+
+def run_jobs(args: argparse.Namespace) -> int:
+    """Run the jobs file through the pipeline, appending results to the output file, and return the failures."""
+    papers: List[PaperBase] = []
+    line_numbers: List[int] = []
+    failed = 0
+    with open(args.jobs, 'r', encoding='utf-8') as jobs, open(args.output, 'a', encoding='utf-8') as output:
+        for line_number, line in enumerate(jobs, start=1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+                papers.append(PaperBase(title=job['title'], description=job.get('description', '')))
+                line_numbers.append(line_number)
+            except (ValueError, KeyError, TypeError) as e:
+                failed += 1
+                record = {'line': line_number, 'error': f"Invalid job: {type(e).__name__}: {e}"}
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        runner = BatchRunner(
+            build_pipeline(
+                args.models, args.llm_concurrency, args.crawl_concurrency, args.stages,
+                args.batch_search, args.overlap_stages
+            ),
+            max_concurrency=args.concurrency
+        )
+        # 每篇论文完成后立即写出，中途中断时已完成的结果不会丢失
+        for result in runner.run(papers, resume=not args.no_resume):
+            record = {'line': line_numbers[result.index]}
+            if result.paper is not None:
+                record['paper'] = result.paper.model_dump()
+            else:
+                failed += 1
+                record['error'] = result.error
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+            print(f"[{line_numbers[result.index]}] {'done' if result.paper is not None else result.error}")
+
+    return failed
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -2,11 +2,19 @@ from .base import PaperBase, PipelineComponent
 from .description import DescriptionGenerator
 from .outline import OutlineGenerator
 from .searcher import SearcherGenerator
+from .crawler import CrawlerComponent
+from .writer import SectionWriter
+from .runner import BatchResult, BatchRunner, Pipeline
 
 __all__ = [
     'PaperBase',
     'PipelineComponent', 
     'DescriptionGenerator',
     'OutlineGenerator',
-    'SearcherGenerator'
+    'SearcherGenerator',
+    'CrawlerComponent',
+    'SectionWriter',
+    'Pipeline',
+    'BatchRunner',
+    'BatchResult'
 ] 
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
+from paper_writer.utils.content_store import ContentStore, get_content_store
+from paper_writer.utils.metrics import metrics
 
 class PaperBase(BaseModel):
     """Base class for paper content."""
@@ -15,9 +17,13 @@ class PaperBase(BaseModel):
         default_factory=list, 
         description="List of citation references"
     )
+    section_citations: Dict[str, List[str]] = Field(
+        default_factory=dict,
+        description="Citations relevant to each section, most relevant first"
+    )
     citation_content: Dict[str, str] = Field(
         default_factory=dict,
-        description="Content of each citation"
+        description="Content store handle of the content of each citation"
     )
     citation_sentence: Dict[str, List[str]] = Field(
         default_factory=dict,
@@ -32,8 +38,43 @@ class PaperBase(BaseModel):
         description="Content of each section"
     )
 
+    def citation_text(
+        self,
+        citation: str,
+        max_chars: Optional[int] = None,
+        store: Optional[ContentStore] = None
+    ) -> str:
+        """
+        Read the content of a citation from the content store.
+
+        Args:
+            citation: Citation in citation_content
+            max_chars: Maximum number of characters to return, None for the whole content
+            store: Content store holding the content, defaults to the shared content store
+
+        Returns:
+            Content of the citation, empty if the stored content was removed from the store
+        """
+        value = self.citation_content[citation]
+        # 旧版本的结果直接保存了内容本身
+        if not ContentStore.is_handle(value):
+            return value if max_chars is None else value[:max_chars]
+        try:
+            return (store or get_content_store()).get(value, max_chars=max_chars)
+        except KeyError:
+            # 内容存储按大小和时间淘汰，检查点中的句柄可能已经失效
+            return ''
+
 class PipelineComponent:
     """Base class for pipeline components that process PaperBase objects."""
+
+    # PaperBase fields read and written by process(), None means the whole paper.
+    # Used by Pipeline to key and restore stage checkpoints.
+    input_fields: Optional[Tuple[str, ...]] = None
+    output_fields: Optional[Tuple[str, ...]] = None
+    # Attributes that change the outputs of process(), such as budgets and thresholds
+    # but not concurrency. Part of the checkpoint key, together with the models used.
+    setting_fields: Tuple[str, ...] = ()
     
     def __init__(self, name: str):
         """
@@ -59,6 +100,23 @@ class PipelineComponent:
         """
         raise NotImplementedError("Subclasses must implement process() method")
         
+    def fingerprint(self) -> Dict[str, Any]:
+        """
+        Settings the outputs of process() depend on, used to key stage checkpoints.
+
+        Returns:
+            Values of setting_fields, and the name and endpoint of every model
+            the component holds by attribute
+        """
+        settings: Dict[str, Any] = {name: getattr(self, name) for name in self.setting_fields}
+        # 按属性持有的模型（例如 self.model），不含 models 中本组件用不到的角色
+        settings['models'] = {
+            name: [value.model_name, value.base_url]
+            for name, value in vars(self).items()
+            if hasattr(value, 'model_name') and hasattr(value, 'base_url')
+        }
+        return settings
+
     def __call__(self, paper: PaperBase) -> PaperBase:
         """
         Allow the component to be called directly.
@@ -69,5 +127,6 @@ class PipelineComponent:
         Returns:
             Modified PaperBase object
         """
-        return self.process(paper)
+        with metrics.span('stage', stage=self.name):
+            return self.process(paper)
 
@@ -1,29 +1,57 @@
 from paper_writer.pipeline.base import PipelineComponent, PaperBase
-from typing import Dict
-import re
-from paper_writer.utils.crawler import crawl_url
+from typing import Dict, Optional
+from paper_writer.utils.content_store import ContentStore, get_content_store
+from paper_writer.utils.crawler import CrawlEngine
+from paper_writer.utils.urls import UrlIndex, extract_urls
 
 class CrawlerComponent(PipelineComponent):
-    """Pipeline component that crawls citation URLs and stores their content."""
-    def __init__(self):
+    """
+    Pipeline component that crawls citation URLs and stores their content.
+
+    The content goes to the content store as soon as each page is crawled;
+    citation_content only keeps the handles. Citations that already have
+    content, such as the pages cited by SearcherGenerator, are not crawled again.
+    """
+    input_fields = ('citations', 'citation_content')
+    output_fields = ('citation_content',)
+    setting_fields = ('max_chars',)
+
+    # 每条引用最多保留的字符数
+    max_chars = 50000
+
+    def __init__(self, crawl_engine: Optional[CrawlEngine] = None, content_store: Optional[ContentStore] = None):
         super().__init__("crawler")
+        self.crawl_engine = crawl_engine or CrawlEngine()
+        self.content_store = content_store or get_content_store()
 
     def process(self, paper: PaperBase) -> PaperBase:
         citation_content: Dict[str, str] = {}
-        url_pattern = re.compile(r"https?://[\w\.-]+(?:/[\w\.-]*)*")
+        index = UrlIndex()
+        citation_urls: Dict[str, str] = {}
         for citation in paper.citations:
-            url_match = url_pattern.search(citation)
-            if url_match:
-                url = url_match.group(0)
-                try:
-                    raw_content = crawl_url(url)
-                    processed_content = self.process_crawled_content(raw_content, url)
-                    citation_content[citation] = processed_content[:50000]
-                except Exception as e:
-                    citation_content[citation] = f"[Failed to crawl: {e}]"
+            value = paper.citation_content.get(citation)
+            # 内容存储中已被淘汰的句柄视为没有爬取过
+            if value is not None and (not ContentStore.is_handle(value) or value in self.content_store):
+                citation_content[citation] = value
+                continue
+            urls = extract_urls(citation)
+            if urls:
+                # 指向同一文档的引用共用一次爬取
+                citation_urls[citation] = index.add(urls[0])
             else:
                 # 不是URL，跳过
                 continue
+
+        urls = index.urls
+        handles: Dict[str, str] = {}
+        for position, result in self.crawl_engine.iter_crawl(urls, max_chars=self.max_chars):
+            if result.ok:
+                processed_content = self.process_crawled_content(result.text, result.url)
+                handles[urls[position]] = self.content_store.put(processed_content[:self.max_chars])
+            else:
+                handles[urls[position]] = self.content_store.put(f"[Failed to crawl: {result.error}]")
+        for citation, url in citation_urls.items():
+            citation_content[citation] = handles[url]
         paper.citation_content = citation_content
         return paper
 
@@ -1,13 +1,22 @@
 from paper_writer.pipeline.base import PipelineComponent, PaperBase
-from paper_writer.utils.model import load_models
+from typing import Dict, Optional
+from paper_writer.utils.model import BaseModel, get_models
 from paper_writer.utils.prompts import format_prompt
 
 class DescriptionGenerator(PipelineComponent):
     """Pipeline component that generates a detailed description based on title and initial description."""
+    input_fields = ('title', 'description')
+    output_fields = ('description',)
     
-    def __init__(self):
+    def __init__(self, models: Optional[Dict[str, BaseModel]] = None):
+        """
+        Initialize the description generator.
+
+        Args:
+            models: Models by role, defaults to the shared models of models.yaml
+        """
         super().__init__("description_generator")
-        self.models = load_models()
+        self.models = models or get_models()
         self.model = self.models['simple']  # Using simple model for description generation
         
     def process(self, paper: PaperBase) -> PaperBase:
@@ -1,15 +1,29 @@
 import json
 import re
+from typing import Dict, Iterator, List, Optional
 from paper_writer.pipeline.base import PipelineComponent, PaperBase
-from paper_writer.utils.model import load_models
+from paper_writer.utils.metrics import metrics
+from paper_writer.utils.model import BaseModel, get_models
 from paper_writer.utils.prompts import format_prompt
 
 class OutlineGenerator(PipelineComponent):
     """Pipeline component that generates an outline based on title and description."""
+    input_fields = ('title', 'description')
+    output_fields = ('outline',)
+    setting_fields = ('max_sections',)
     
-    def __init__(self):
+    def __init__(self, max_sections: Optional[int] = None, models: Optional[Dict[str, BaseModel]] = None):
+        """
+        Initialize the outline generator.
+
+        Args:
+            max_sections: Stop the generation once this many sections were received,
+                None keeps every section
+            models: Models by role, defaults to the shared models of models.yaml
+        """
         super().__init__("outline_generator")
-        self.models = load_models()
+        self.max_sections = max_sections
+        self.models = models or get_models()
         self.model = self.models['simple']  # Using simple model for outline generation
         
     def process(self, paper: PaperBase) -> PaperBase:
@@ -22,20 +36,52 @@ class OutlineGenerator(PipelineComponent):
         Returns:
             Modified PaperBase object with updated outline
         """
+        # Update the paper object
+        paper.outline = list(self.stream_outline(paper))
+        
+        return paper
+
+    def stream_outline(self, paper: PaperBase) -> Iterator[str]:
+        """
+        Generate the outline, yielding each section as soon as it was fully received.
+
+        The first token and total latencies of the generation are recorded in
+        metrics, also when the caller stops iterating early.
+
+        Args:
+            paper: PaperBase object with title and description
+
+        Returns:
+            Iterator over outline sections, formatted as "key:section"
+        """
         # Generate prompt using the format_prompt function from utils.prompts
         prompt = format_prompt("outline", paper=paper)
 
-        # Generate new outline
-        outline_response = self.model.query(prompt)
+        parser = _OutlineStreamParser()
+        count = 0
+        stream = self.model.stream(prompt)
+        try:
+            with stream:
+                for chunk in stream:
+                    sections = parser.feed(chunk)
+                    if self.max_sections is not None:
+                        sections = sections[:self.max_sections - count]
+                    yield from sections
+                    count += len(sections)
+                    # 已得到所需的章节时提前结束生成
+                    if self.max_sections is not None and count >= self.max_sections:
+                        break
+        finally:
+            # 多篇论文共用同一个生成器实例，延迟记录到指标中而不是实例属性上
+            metrics.incr('outline_streams')
+            metrics.incr('outline_total_seconds', stream.total_latency or 0.0)
+            if stream.first_token_latency is not None:
+                metrics.incr('outline_first_token_seconds', stream.first_token_latency)
 
-        # Parse the outline response into a list of sections
-        # The model should return a structured outline that we can parse
-        outline_sections = self._parse_outline_response(outline_response)
-        
-        # Update the paper object
-        paper.outline = outline_sections
-        
-        return paper
+        # 响应不是可增量解析的 JSON 对象时，对完整响应整体解析
+        if count == 0:
+            sections = self._parse_outline_response(stream.text)
+            yield from sections[:self.max_sections]
     
     def _parse_outline_response(self, response: str) -> list:
         """
@@ -66,7 +112,58 @@ class OutlineGenerator(PipelineComponent):
             outline_sections.append(f"{key}:{section}")
         
         return outline_sections
-    
+
+class _OutlineStreamParser:
+    """
+    Incrementally parse a streamed JSON object of string sections, returning
+    each key/value pair once its value string is complete.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.pos: Optional[int] = None
+        self.done = False
+        self.decoder = json.JSONDecoder()
+
+    def feed(self, chunk: str) -> List[str]:
+        self.buffer += chunk
+        if self.pos is None:
+            start = self.buffer.find('{')
+            if start < 0:
+                return []
+            self.pos = start + 1
+
+        sections = []
+        while not self.done:
+            pos = self._skip(self.pos, ' \t\r\n,')
+            if pos < len(self.buffer) and self.buffer[pos] == '}':
+                self.done = True
+                break
+            try:
+                key, pos = self.decoder.raw_decode(self.buffer, pos)
+                pos = self._skip(pos, ' \t\r\n')
+                if pos >= len(self.buffer):
+                    break
+                if self.buffer[pos] != ':':
+                    # 不是合法的 JSON 对象，停止增量解析
+                    self.done = True
+                    break
+                value, pos = self.decoder.raw_decode(self.buffer, self._skip(pos + 1, ' \t\r\n'))
+            except json.JSONDecodeError:
+                # 键或值还没有接收完整
+                break
+            # 数字等非字符串值可能还没有接收完整，等到后面的分隔符出现再解析
+            if not isinstance(value, str) and self._skip(pos, ' \t\r\n') >= len(self.buffer):
+                break
+            self.pos = pos
+            sections.append(f"{str(key).strip()}:{str(value).strip()}")
+        return sections
+
+    def _skip(self, pos: int, chars: str) -> int:
+        while pos < len(self.buffer) and self.buffer[pos] in chars:
+            pos += 1
+        return pos
+
 if __name__=="__main__":
     a = OutlineGenerator()
     paper = PaperBase()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from paper_writer.pipeline.base import PaperBase, PipelineComponent
+from paper_writer.utils.cache import CACHE_DIR
+from paper_writer.utils.content_store import ContentStore, get_content_store
+
+class Pipeline:
+    """Run pipeline components in order, checkpointing the paper after each stage."""
+
+    def __init__(
+        self,
+        components: List[PipelineComponent],
+        checkpoint_dir: Optional[str] = None,
+        content_store: Optional[ContentStore] = None
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            components: Pipeline components, run in the given order
+            checkpoint_dir: Directory of the stage checkpoints. Defaults to
+                .cache/checkpoints in the project root
+            content_store: Store holding the citation content that checkpoints
+                refer to, used for components without a content store of their
+                own. Defaults to the shared content store
+        """
+        self.components = components
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir is not None else CACHE_DIR / 'checkpoints'
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.content_store = content_store or get_content_store()
+
+    def run(self, paper: PaperBase, resume: bool = True) -> PaperBase:
+        """
+        Run all components on the paper.
+
+        Each stage is keyed on a hash of the paper fields it reads, the
+        component's settings and its models. When a checkpoint with the same
+        key exists, its outputs are restored instead of running the stage, so
+        a changed title or description only reruns the stages whose inputs
+        changed, and a changed setting or model reruns its own stage. Checkpoints whose citation content
+        was since removed from the content store are not restored.
+
+        Args:
+            paper: Input PaperBase object
+            resume: Whether to restore stages from existing checkpoints
+
+        Returns:
+            Modified PaperBase object
+        """
+        for component in self.components:
+            path = self._checkpoint_path(component, paper)
+            outputs = self._load_checkpoint(path, getattr(component, 'content_store', None) or self.content_store) \
+                if resume else None
+            if outputs is not None:
+                paper = paper.model_copy(update=outputs)
+                continue
+
+            paper = component(paper)
+            self._save_checkpoint(path, paper.model_dump(include=self._fields(component.output_fields)))
+
+        return paper
+
+    def _checkpoint_path(self, component: PipelineComponent, paper: PaperBase) -> Path:
+        inputs = paper.model_dump(include=self._fields(component.input_fields))
+        # 组件设置或模型变化时输出也会变化，一并计入键
+        payload = json.dumps([component.name, component.fingerprint(), inputs], ensure_ascii=False, sort_keys=True)
+        key = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return self.checkpoint_dir / f"{component.name}-{key}.json"
+
+    @staticmethod
+    def _fields(fields: Optional[tuple]) -> Optional[set]:
+        # None means the whole paper
+        return set(fields) if fields is not None else None
+
+    @staticmethod
+    def _load_checkpoint(path: Path, store: ContentStore) -> Optional[Dict[str, Any]]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                outputs = PaperBase.model_validate(json.load(f)).model_dump(exclude_unset=True)
+        except (OSError, ValueError):
+            # 损坏的检查点视为不存在，重新运行该阶段
+            return None
+        # 引用内容已被内容存储淘汰时，检查点同样失效
+        for value in (outputs.get('citation_content') or {}).values():
+            if ContentStore.is_handle(value) and value not in store:
+                return None
+        return outputs
+
+    @staticmethod
+    def _save_checkpoint(path: Path, outputs: Dict[str, Any]) -> None:
+        # 先写临时文件再替换，中途失败不会留下不完整的检查点；
+        # 临时文件名带上线程号，并发运行相同输入的论文时不会互相覆盖
+        tmp_path = path.with_suffix(f'.{os.getpid()}-{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(outputs, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+class BatchResult(NamedTuple):
+    """Outcome of one paper in a batch."""
+
+    index: int
+    paper: Optional[PaperBase] = None
+    error: Optional[str] = None
+
+class BatchRunner:
+    """Run many papers through one shared Pipeline concurrently."""
+
+    def __init__(self, pipeline: Pipeline, max_concurrency: int = 4):
+        """
+        Initialize the batch runner.
+
+        Args:
+            pipeline: Pipeline shared by all papers, so that model clients,
+                the crawl engine and caches are shared as well
+            max_concurrency: Maximum number of papers in flight at once
+        """
+        self.pipeline = pipeline
+        self.max_concurrency = max(1, max_concurrency)
+
+    def run(self, papers: Iterable[PaperBase], resume: bool = True) -> Iterator[BatchResult]:
+        """
+        Run the papers concurrently, yielding each result as soon as it finishes.
+
+        Papers are read from the iterable lazily, at most max_concurrency at a
+        time, so large batches are never held in memory at once.
+
+        Args:
+            papers: Input PaperBase objects
+            resume: Whether to restore stages from existing checkpoints
+
+        Returns:
+            Iterator over results in completion order, failures are reported
+            through BatchResult.error instead of raising
+        """
+        papers = iter(enumerate(papers))
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending: Dict[Future, int] = {}
+            while True:
+                while len(pending) < self.max_concurrency:
+                    item = next(papers, None)
+                    if item is None:
+                        break
+                    index, paper = item
+                    pending[executor.submit(self.pipeline.run, paper, resume)] = index
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        result = BatchResult(index=index, paper=future.result())
+                    except Exception as e:
+                        result = BatchResult(index=index, error=f"{type(e).__name__}: {e}")
+                    yield result
@@ -1,17 +1,95 @@
 from paper_writer.pipeline.base import PipelineComponent, PaperBase
-from paper_writer.utils.model import load_models
+from paper_writer.utils.model import BaseModel, ModelError, SearchModel, get_models
 from paper_writer.utils.prompts import format_prompt
-from paper_writer.utils.crawler import crawl_url
-from paper_writer.utils.cleaner import full_clean_pipeline
-from typing import List, Dict
+from paper_writer.utils.crawler import CrawlEngine, CrawlResult
+from paper_writer.utils.citation import format_gbt7714, format_metadata_hints
+from paper_writer.utils.content_store import ContentStore, get_content_store
+from paper_writer.utils.metrics import metrics
+from paper_writer.utils.tokens import estimate_tokens, truncate_to_tokens
+from paper_writer.utils.urls import UrlIndex, clean_url, extract_urls, url_key
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Deque, Iterable, Iterator, List, Dict, NamedTuple, Optional, Tuple
+import json
 import re
 
+if TYPE_CHECKING:
+    from paper_writer.utils.bm25 import BM25Index
+
+class _CrawledPage(NamedTuple):
+    """A crawled page kept for citation."""
+
+    # Position of the page's URL in the crawled URLs
+    index: int
+    # Estimated tokens of the cleaned text
+    tokens: int
+    # Citation formatted from the page's metadata, None if the model has to generate it
+    citation: Optional[str]
+    # Content store handle of the cleaned text
+    handle: str
+    # Known fields of incomplete metadata, given to the model with the text
+    hints: str = ''
+
 class SearcherGenerator(PipelineComponent):
     """Pipeline component that generates search results for each section in the outline."""
+    input_fields = ('title', 'description', 'outline')
+    output_fields = ('citations', 'section_citations', 'citation_content')
+    setting_fields = (
+        'citation_batch_tokens', 'batch_sections', 'duplicate_threshold', 'top_k_per_section', 'overlap_stages',
+        'max_chars'
+    )
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        crawl_engine: Optional[CrawlEngine] = None,
+        citation_batch_tokens: Optional[int] = 12000,
+        models: Optional[Dict[str, BaseModel]] = None,
+        batch_sections: bool = False,
+        duplicate_threshold: Optional[float] = 0.7,
+        top_k_per_section: Optional[int] = 5,
+        content_store: Optional[ContentStore] = None,
+        overlap_stages: bool = False,
+        max_chars: Optional[int] = 50000
+    ):
+        """
+        Initialize the searcher generator.
+
+        Args:
+            max_concurrency: Maximum number of section searches or citation requests in flight at once
+            crawl_engine: Engine used to crawl the found URLs, defaults to a new CrawlEngine
+            citation_batch_tokens: Estimated token budget of the texts packed into one
+                citation request, None disables batching
+            models: Models by role, defaults to the shared models of models.yaml
+            batch_sections: Whether to search for all sections in one request, so the title
+                and description are sent once. Sections without results fall back to
+                one request each
+            duplicate_threshold: Estimated share of the shorter cleaned text's word shingles
+                also in the other text above which crawled pages count as copies of the
+                same document and get one citation, e.g. a landing page and its PDF.
+                None disables near-duplicate detection
+            top_k_per_section: Number of crawled pages kept per outline section, ranked by BM25
+                relevance to the section; pages not kept by any section are not cited.
+                None cites every page
+            content_store: Store holding the cleaned texts until they are cited,
+                defaults to the shared content store
+            overlap_stages: Whether to start crawling the URLs of each finished section
+                search while other sections are still being searched. The output is the
+                same as without overlap, except which copy of a near-duplicate is kept
+            max_chars: Character budget of each crawled page, PDF parsing stops once it
+                is reached. None keeps whole documents
+        """
         super().__init__("searcher_generator")
-        self.models = load_models()
+        self.max_concurrency = max_concurrency
+        self.citation_batch_tokens = citation_batch_tokens
+        self.batch_sections = batch_sections
+        self.duplicate_threshold = duplicate_threshold
+        self.top_k_per_section = top_k_per_section
+        self.overlap_stages = overlap_stages
+        self.max_chars = max_chars
+        self.content_store = content_store or get_content_store()
+        self.crawl_engine = crawl_engine or CrawlEngine()
+        self.models = models or get_models()
         self.search_model = self.models['search']  # Using search model for searcher generation
         self.simple_model = self.models['simple']  # Using search model for searcher generation
 
@@ -28,28 +106,205 @@ class SearcherGenerator(PipelineComponent):
         if not paper.outline:
             raise ValueError("Paper must have an outline before generating search results")
         
-        # Generate search results for each section
-        section_searchers = {}
-        all_searchers = []
-        
-        for section in paper.outline:
-            # Generate search results for this specific section
-            section_searchers_list = self._generate_searchers_for_section(paper, section)
-            section_searchers[section] = section_searchers_list
-            all_searchers.extend(section_searchers_list)
-
-        # Remove duplicates while preserving order
-        unique_searchers = list(dict.fromkeys(all_searchers))
+        if self.overlap_stages:
+            crawled = self._search_and_crawl(paper)
+        else:
+            # Generate search results for all sections, results keep outline order
+            all_searchers = []
+            for section_searchers_list in self._generate_searchers(paper):
+                all_searchers.extend(section_searchers_list)
 
-        texts = self._crawl_urls_texts(unique_searchers)
+            # Collapse equivalent URLs (tracking parameters, arXiv abs/pdf, doi.org) while preserving order
+            unique_searchers = UrlIndex(all_searchers).urls
+            crawled = self.crawl_engine.iter_crawl(unique_searchers, max_chars=self.max_chars, clean=True)
 
-        citations = self._generate_citations_from_texts(texts)
+        citations, section_citations, citation_content = self._generate_citations(crawled, paper.outline)
 
         # Update the paper object
         paper.citations = citations
+        paper.section_citations = section_citations
+        paper.citation_content = citation_content
         
         return paper
     
+    def _generate_searchers(self, paper: PaperBase) -> List[List[str]]:
+        """
+        Generate search results for every section in the outline.
+
+        Args:
+            paper: PaperBase object with title, description and outline
+
+        Returns:
+            List of URLs per section, in outline order
+        """
+        section_searchers: List[List[str]] = (
+            self._generate_searchers_for_sections(paper) if self.batch_sections else [[] for _ in paper.outline]
+        )
+
+        # 逐章节请求未启用批量模式时的所有章节，以及批量结果中为空的章节，并发执行
+        missing = [index for index, searchers in enumerate(section_searchers) if not searchers]
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) as executor:
+                results = executor.map(
+                    lambda index: self._generate_searchers_for_section(paper, paper.outline[index]),
+                    missing
+                )
+                for index, searchers in zip(missing, results):
+                    section_searchers[index] = searchers
+
+        return section_searchers
+
+    def _search_and_crawl(self, paper: PaperBase) -> Iterator[Tuple[int, CrawlResult]]:
+        """
+        Search the sections and crawl the found URLs as overlapping stages.
+
+        The URLs of each finished section search are crawled right away, while
+        other sections are still being searched. At most twice the crawl
+        engine's max_concurrency crawls are in flight or waiting to be consumed,
+        so a slow consumer holds back the crawls. Results are yielded in the
+        order of the URLs without overlap, first appearance in outline order,
+        no matter in which order the searches and crawls finish.
+
+        Args:
+            paper: PaperBase object with title, description and outline
+
+        Yields:
+            (URL index, CrawlResult) pairs, in URL index order
+        """
+        sections = paper.outline
+        section_searchers: List[Optional[List[str]]] = [None] * len(sections)
+        if self.batch_sections:
+            for number, searchers in enumerate(self._generate_searchers_for_sections(paper)):
+                section_searchers[number] = searchers or None
+
+        window = 2 * self.crawl_engine.max_concurrency
+        index = UrlIndex()
+        # 每个 URL 序号要爬取的 URL，与不重叠时的 UrlIndex 顺序相同
+        ordered: List[str] = []
+        # 已提交但尚未被消费的爬取，按 URL
+        crawls: Dict[str, Future] = {}
+        # 已搜索完成但前面还有章节未完成的 URL，先行爬取
+        ahead: Deque[str] = deque()
+        ahead_keys = set()
+        released = submitted = next_index = 0
+
+        search_executor = ThreadPoolExecutor(max_workers=max(1, self.max_concurrency))
+        crawl_executor = ThreadPoolExecutor(max_workers=self.crawl_engine.thread_count(window))
+
+        def crawl(url: str) -> None:
+            crawls[url] = crawl_executor.submit(self.crawl_engine.crawl_one, url, self.max_chars, True)
+
+        searches = {
+            search_executor.submit(self._generate_searchers_for_section, paper, sections[number]): number
+            for number, searchers in enumerate(section_searchers) if searchers is None
+        }
+        try:
+            while True:
+                for future in [future for future in searches if future.done()]:
+                    number = searches.pop(future)
+                    section_searchers[number] = future.result()
+                    ahead.extend(section_searchers[number])
+
+                # 只有前面的章节都搜索完成后，章节中 URL 的序号才能确定
+                while released < len(sections) and section_searchers[released] is not None:
+                    for url in section_searchers[released]:
+                        chosen = index.add(url)
+                        if len(index) > len(ordered):
+                            ordered.append(chosen)
+                        elif clean_url(url) != chosen and clean_url(url) in crawls:
+                            # 先行爬取的是同一文档的另一个地址，改用先出现的地址
+                            crawls.pop(clean_url(url)).cancel()
+                    released += 1
+
+                # 已确定序号的 URL 优先爬取；下一个要消费的 URL 不受窗口限制，避免窗口被先行爬取占满
+                submitted = max(submitted, next_index)
+                while submitted < len(ordered) and (len(crawls) < window or submitted == next_index):
+                    if ordered[submitted] not in crawls:
+                        crawl(ordered[submitted])
+                    submitted += 1
+                while ahead and len(crawls) < window:
+                    url = ahead.popleft()
+                    if url in index or url_key(url) in ahead_keys:
+                        continue
+                    ahead_keys.add(url_key(url))
+                    crawl(clean_url(url))
+
+                while next_index < len(ordered) and ordered[next_index] in crawls \
+                        and crawls[ordered[next_index]].done():
+                    yield next_index, crawls.pop(ordered[next_index]).result()
+                    next_index += 1
+
+                if released == len(sections) and next_index == len(ordered):
+                    return
+                waiting = set(searches)
+                if next_index < len(ordered) and ordered[next_index] in crawls:
+                    waiting.add(crawls[ordered[next_index]])
+                wait(waiting, return_when=FIRST_COMPLETED)
+        finally:
+            # 消费者提前停止或搜索失败时取消尚未开始的搜索和爬取
+            search_executor.shutdown(wait=False, cancel_futures=True)
+            crawl_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _generate_searchers_for_sections(self, paper: PaperBase) -> List[List[str]]:
+        """
+        Generate search results for all sections in one request.
+
+        Args:
+            paper: PaperBase object with title, description and outline
+
+        Returns:
+            List of URLs per section, in outline order, empty for every section
+            that could not be parsed
+        """
+        numbered = '\n\n'.join(f"[{i}]\n{section}" for i, section in enumerate(paper.outline, start=1))
+        batch_prompt = format_prompt("searcher_batch", paper=paper, sections=numbered, count=len(paper.outline))
+        return self._parse_searchers_batch_response(self.search_model.query(batch_prompt), len(paper.outline))
+
+    def _parse_searchers_batch_response(self, response: str, count: int) -> List[List[str]]:
+        """
+        Parse a JSON object of search results keyed by section number.
+
+        URLs written in the results are used directly; citation markers such as
+        [2] are resolved against the citations field of the response.
+
+        Args:
+            response: Raw response from the search model
+            count: Number of sections in the request
+
+        Returns:
+            List of count URL lists, empty for every section that could not be parsed
+        """
+        content, citations = SearchModel.split_citations(response)
+        try:
+            results = json.loads(content)
+        except json.JSONDecodeError:
+            # 如果直接解析失败，尝试提取JSON部分
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            try:
+                results = json.loads(json_match.group(0)) if json_match else None
+            except json.JSONDecodeError:
+                results = None
+        if not isinstance(results, dict):
+            return [[] for _ in range(count)]
+
+        section_searchers = []
+        for number in range(1, count + 1):
+            entries = results.get(str(number))
+            if isinstance(entries, str):
+                entries = [entries]
+            if not isinstance(entries, list):
+                section_searchers.append([])
+                continue
+
+            text = '\n'.join(entry for entry in entries if isinstance(entry, str))
+            urls = extract_urls(text)
+            for marker in re.findall(r'\[(\d+)\]', text):
+                if 1 <= int(marker) <= len(citations):
+                    urls.append(citations[int(marker) - 1])
+            section_searchers.append(list(dict.fromkeys(urls)))
+
+        return section_searchers
+
     def _generate_searchers_for_section(self, paper: PaperBase, section: str) -> List[str]:
         """
         Generate search results for a specific section.
@@ -80,40 +335,239 @@ class SearcherGenerator(PipelineComponent):
         Returns:
             List of URL
         """
-        if not response:
-            return []
+        return extract_urls(response)
 
-        url_pattern = re.compile(r"https?://[\w\.-]+(?:/[\w\.-]*)*")
-        pos = 0
-        urls = []
+    def _generate_citations(
+        self,
+        crawled: Iterable[Tuple[int, CrawlResult]],
+        sections: List[str]
+    ) -> Tuple[List[str], Dict[str, List[str]], Dict[str, str]]:
+        """
+        Keep the crawled pages relevant to the outline and generate one citation
+        per kept page.
 
-        while True:
-            url_match = url_pattern.search(response[pos:])
-            if url_match == None:
-                break
-            pos += url_match.end()
-            urls.append(url_match.group())
+        When top_k_per_section is set, every page is scored against every section
+        with BM25 and only the top_k_per_section pages of each section are cited,
+        so citations are generated once all pages are crawled. Otherwise each page
+        is cited as soon as it is crawled.
 
-        return urls
+        Args:
+            crawled: (URL index, CrawlResult) pairs of the crawled URLs
+            sections: Outline sections to rank the pages against
+
+        Returns:
+            Citations in the order of the URLs, the citations of each section,
+            most relevant first (empty when ranking is disabled), and the content
+            store handle of the cleaned text of each citation
+        """
+        # NumPy 导入较慢，只在需要时才导入
+        from paper_writer.utils.bm25 import BM25Index
 
-    def _crawl_urls_texts(self, searchers: List[str]) -> List[str]:
-        texts = []
-        for searcher in searchers:
-            text = crawl_url(searcher)
-            text = full_clean_pipeline(text)
-            texts.append(text)
+        relevance = BM25Index() if self.top_k_per_section else None
+        handles: Dict[int, str] = {}
 
-        return texts
+        def track(pages: Iterable[_CrawledPage]) -> Iterator[_CrawledPage]:
+            for page in pages:
+                handles[page.index] = page.handle
+                yield page
+
+        def contents(citations: Dict[int, str]) -> Dict[str, str]:
+            # 空白引用（信息不足）没有对应的内容；同一引用对应多个页面时保留 URL 最靠前的一个
+            citation_content: Dict[str, str] = {}
+            for index in sorted(citations):
+                if citations[index]:
+                    citation_content.setdefault(citations[index], handles[index])
+            return citation_content
+
+        pages = self._iter_pages(crawled, relevance)
+        if relevance is None:
+            citations = self._cite_pages(track(pages))
+            # 按 URL 的原始顺序输出，与爬取完成的顺序无关
+            return [citations[index] for index in sorted(citations)], {}, contents(citations)
+
+        pages = list(pages)
+        ranked = {section: relevance.top_k(section, self.top_k_per_section) for section in sections}
+        selected = sorted({number for numbers in ranked.values() for number in numbers})
+        metrics.incr('pruned_sources', len(pages) - len(selected))
+
+        citations = self._cite_pages(track(pages[number] for number in selected))
+        ordered = sorted(selected, key=lambda number: pages[number].index)
+        section_citations = {
+            section: [citations[pages[number].index] for number in numbers]
+            for section, numbers in ranked.items()
+        }
+        return [citations[pages[number].index] for number in ordered], section_citations, contents(citations)
+
+    def _iter_pages(
+        self,
+        crawled: Iterable[Tuple[int, CrawlResult]],
+        relevance: Optional["BM25Index"] = None
+    ) -> Iterator[_CrawledPage]:
+        """
+        Consume a stream of crawl results and move each page's text to the
+        content store as it arrives, keeping only its index terms in memory.
 
-    def _generate_citations_from_texts(self, texts: List[str]) -> List[str]:
-        citations = []
-        for text in texts:
-            citation_prompt = format_prompt("citation", text=text)
-            citation_response = self.simple_model.query(citation_prompt)
-            citations.append(citation_response)
+        Near-duplicate pages, such as an arXiv PDF and its publisher page, are
+        clustered by MinHash and only the first page of each cluster is kept.
+        Pages that carry complete citation metadata are formatted right away.
+        Pages that failed to crawl are skipped.
+
+        Args:
+            crawled: (URL index, CrawlResult) pairs with cleaned texts
+            relevance: BM25 index the kept pages are added to, numbered in the
+                order the pages are yielded
+
+        Yields:
+            The kept pages, in the order of the crawl results
+        """
+        from paper_writer.utils.minhash import NearDuplicateIndex
+
+        duplicates = NearDuplicateIndex(self.duplicate_threshold) if self.duplicate_threshold is not None else None
+        for index, result in crawled:
+            # 爬取失败的 URL 没有可用于生成引用的内容，直接跳过
+            if not result.ok:
+                continue
+
+            # PDF 解析在预算处停止，但 HTML 和最后一页的文本仍可能超出
+            text = result.text if self.max_chars is None else result.text[:self.max_chars]
+            # 同一文档的多个副本只保留最先爬到的一个
+            if duplicates is not None and duplicates.add(index, text) != index:
+                metrics.incr('near_duplicates')
+                continue
+            if relevance is not None:
+                relevance.add(text)
+
+            # 所有保留的页面都写入内容存储，后续章节撰写从中读取引用的内容
+            handle = self.content_store.put(text)
+            if result.metadata is not None and result.metadata.is_complete():
+                yield _CrawledPage(index, 0, format_gbt7714(result.metadata), handle)
+            else:
+                # 不完整的元数据（例如 PDF 文档信息中的标题和作者）作为提示交给模型
+                hints = format_metadata_hints(result.metadata) if result.metadata is not None else ''
+                yield _CrawledPage(index, estimate_tokens(text) + estimate_tokens(hints), None, handle, hints)
+
+    def _cite_pages(self, pages: Iterable[_CrawledPage]) -> Dict[int, str]:
+        """
+        Generate the citations of pages, packing the texts of pages without a
+        citation into batches under the citation token budget. Texts are read
+        back from the content store only when their batch is sent, and at most
+        max_concurrency batches wait for the model at a time, which also holds
+        back a stream of pages.
+
+        Args:
+            pages: Pages to cite, a list or a stream
+
+        Returns:
+            Citation of each page by URL index
+        """
+        citations: Dict[int, str] = {}
+        batch: List[_CrawledPage] = []
+        batch_tokens = 0
+        pending: Deque[Tuple[List[_CrawledPage], Future]] = deque()
+
+        def collect(entry: Tuple[List[_CrawledPage], Future]) -> None:
+            batch_pages, future = entry
+            for page, citation in zip(batch_pages, future.result()):
+                citations[page.index] = citation
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) as executor:
+            def submit(batch_pages: List[_CrawledPage]) -> None:
+                # 等待最早的批次完成，限制同时在等待模型的文本数量
+                while len(pending) >= max(1, self.max_concurrency):
+                    collect(pending.popleft())
+                texts = [self._citation_text(page) for page in batch_pages]
+                pending.append((batch_pages, executor.submit(self._generate_citation_batch, texts)))
+
+            for page in pages:
+                if page.citation is not None:
+                    citations[page.index] = page.citation
+                    continue
+                if batch and (not self.citation_batch_tokens or batch_tokens + page.tokens > self.citation_batch_tokens):
+                    submit(batch)
+                    batch, batch_tokens = [], 0
+                batch.append(page)
+                batch_tokens += page.tokens
+
+            if batch:
+                submit(batch)
+            while pending:
+                collect(pending.popleft())
 
         return citations
 
+    def _citation_text(self, page: _CrawledPage) -> str:
+        """
+        Read the stored text of a page for a citation prompt, cut to the citation
+        batch budget and preceded by the page's metadata hints.
+        """
+        if not self.citation_batch_tokens:
+            text = self.content_store.get(page.handle)
+        else:
+            budget = max(0, self.citation_batch_tokens - estimate_tokens(page.hints))
+            # 非中日韩文本约每 4 个字符一个 token，先按上限读取，再按估计值截断
+            text = truncate_to_tokens(self.content_store.get(page.handle, max_chars=budget * 4), budget)
+        if page.hints:
+            return f"Known metadata:\n{page.hints}\n\nContent:\n{text}"
+        return text
+
+    def _generate_citation(self, text: str) -> str:
+        """Generate the citation of one text, a blank string if the request fails."""
+        citation_prompt = format_prompt("citation", text=text)
+        try:
+            return self.simple_model.query(citation_prompt)
+        except ModelError:
+            # 单个页面的失败不应使整篇论文的检索阶段失败，按信息不足处理
+            metrics.incr('citation_failures')
+            return ""
+
+    def _generate_citation_batch(self, texts: List[str]) -> List[str]:
+        """
+        Generate citations for a batch of texts in one request, falling back to
+        single-text requests for every item that could not be parsed, or for
+        every item when the batch request fails.
+        """
+        if len(texts) == 1:
+            return [self._generate_citation(texts[0])]
+
+        numbered = '\n\n'.join(f"[{i}]\n{text}" for i, text in enumerate(texts, start=1))
+        batch_prompt = format_prompt("citation_batch", texts=numbered, count=len(texts))
+        try:
+            parsed = self._parse_citation_batch_response(self.simple_model.query(batch_prompt), len(texts))
+        except ModelError:
+            parsed = [None] * len(texts)
+
+        return [
+            citation if citation is not None else self._generate_citation(text)
+            for text, citation in zip(texts, parsed)
+        ]
+
+    def _parse_citation_batch_response(self, response: str, count: int) -> List[Optional[str]]:
+        """
+        Parse a JSON array of citations.
+
+        Args:
+            response: Raw response from the model
+            count: Number of texts in the batch
+
+        Returns:
+            List of count citations, None for every item that could not be parsed
+        """
+        try:
+            results = json.loads(response)
+        except json.JSONDecodeError:
+            # 如果直接解析失败，尝试提取JSON部分
+            json_match = re.search(r'\[.*\]', response, re.DOTALL)
+            try:
+                results = json.loads(json_match.group(0)) if json_match else None
+            except json.JSONDecodeError:
+                results = None
+
+        # 数量不一致时无法确定对应关系，全部回退为单独请求
+        if not isinstance(results, list) or len(results) != count:
+            return [None] * count
+
+        return [result.strip() if isinstance(result, str) else None for result in results]
+
 if __name__=="__main__":
     a = SearcherGenerator()
     paper = PaperBase()
@@ -0,0 +1,286 @@
+from paper_writer.pipeline.base import PipelineComponent, PaperBase
+from paper_writer.utils.model import BaseModel, get_models
+from paper_writer.utils.prompts import format_prompt
+from paper_writer.utils.content_store import ContentStore, get_content_store
+from paper_writer.utils.metrics import metrics
+from paper_writer.utils.tokens import estimate_tokens
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import re
+
+# 引用标记，例如 [3]
+_MARKER_RE = re.compile(r'\[(\d+)\]')
+# 句末标点之后断句，包括中文的句号、感叹号和问号
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?\u3002\uff01\uff1f])\s+|(?<=[\u3002\uff01\uff1f])')
+
+class SectionWriter(PipelineComponent):
+    """
+    Pipeline component that drafts every outline section from its most relevant citations.
+
+    Each section prompt gets the passages of its citations that are most
+    relevant to the section, ranked by BM25, rather than the start of each
+    document.
+    """
+    input_fields = (
+        'title', 'description', 'outline', 'section_outline', 'citations', 'section_citations', 'citation_content'
+    )
+    output_fields = ('section_content', 'citation_sentence', 'paper_content')
+    setting_fields = ('context_tokens', 'excerpt_tokens', 'passage_tokens', 'max_source_chars')
+
+    # 每条引用最多读取的字符数
+    max_source_chars = 50000
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        context_tokens: int = 16000,
+        excerpt_tokens: int = 2000,
+        passage_tokens: int = 150,
+        models: Optional[Dict[str, BaseModel]] = None,
+        content_store: Optional[ContentStore] = None
+    ):
+        """
+        Initialize the section writer.
+
+        Args:
+            max_concurrency: Maximum number of sections drafted at once
+            context_tokens: Estimated token budget of one section prompt, source
+                excerpts are added most relevant first until it is used up
+            excerpt_tokens: Estimated tokens of the passages kept from each source
+            passage_tokens: Estimated tokens of the passages sources are split into
+            models: Models by role, defaults to the shared models of models.yaml
+            content_store: Store holding the crawled citation content,
+                defaults to the shared content store
+        """
+        super().__init__("section_writer")
+        self.max_concurrency = max_concurrency
+        self.context_tokens = context_tokens
+        self.excerpt_tokens = excerpt_tokens
+        self.passage_tokens = passage_tokens
+        self.content_store = content_store or get_content_store()
+        self.models = models or get_models()
+        self.model = self.models['complex']  # Using complex model for section writing
+
+    def process(self, paper: PaperBase) -> PaperBase:
+        """
+        Draft all sections concurrently and assemble them into the paper.
+
+        Args:
+            paper: Input PaperBase object with outline, section citations and citation content
+
+        Returns:
+            Modified PaperBase object with section content, citation sentences and paper content
+        """
+        if not paper.outline:
+            raise ValueError("Paper must have an outline before writing sections")
+
+        # 未按章节排序引用时（top_k_per_section=None），按内容与各章节的相关度排序全部引用
+        section_citations = paper.section_citations or self._rank_citations(paper)
+
+        # 各章节互不依赖，并发撰写，总耗时约为最慢的一个章节
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) as executor:
+            drafts = list(executor.map(
+                lambda section: self._write_section(paper, section, section_citations.get(section, [])),
+                paper.outline
+            ))
+
+        # 章节内的来源编号改为全文按首次出现顺序的编号
+        numbers: Dict[str, int] = {}
+        section_content: Dict[str, str] = {}
+        citation_sentence: Dict[str, List[str]] = {}
+        for section, (text, sources) in zip(paper.outline, drafts):
+            def renumber(match: re.Match) -> str:
+                local = int(match.group(1))
+                if not 1 <= local <= len(sources):
+                    # 模型编造的来源编号没有对应的引用，删除
+                    return ''
+                citation = sources[local - 1]
+                if citation not in numbers:
+                    numbers[citation] = len(numbers) + 1
+                return f"[{numbers[citation]}]"
+
+            text = _MARKER_RE.sub(renumber, text)
+            section_content[section] = text
+            for sentence in self._split_sentences(text):
+                cited = {int(number) for number in _MARKER_RE.findall(sentence)}
+                for citation, number in numbers.items():
+                    if number in cited:
+                        citation_sentence.setdefault(citation, []).append(sentence)
+
+        # Update the paper object
+        paper.section_content = section_content
+        paper.citation_sentence = citation_sentence
+        paper.paper_content = self._assemble(paper, section_content, list(numbers))
+
+        return paper
+
+    def _rank_citations(self, paper: PaperBase) -> Dict[str, List[str]]:
+        """
+        Rank the citations with content against every section with BM25.
+
+        Args:
+            paper: PaperBase object with outline, citations and citation content
+
+        Returns:
+            Citations of each section, most relevant first, followed by the
+            citations that share no term with the section
+        """
+        # NumPy 导入较慢，只在需要时才导入
+        from paper_writer.utils.bm25 import BM25Index
+
+        citations = [citation for citation in paper.citations if citation in paper.citation_content]
+        relevance = BM25Index()
+        for citation in citations:
+            relevance.add(paper.citation_text(citation, max_chars=self.max_source_chars, store=self.content_store))
+
+        section_citations = {}
+        for section in paper.outline:
+            ranked = [citations[number] for number in relevance.top_k(self._query(paper, section), len(citations))]
+            section_citations[section] = ranked + [citation for citation in citations if citation not in ranked]
+        return section_citations
+
+    def _write_section(self, paper: PaperBase, section: str, citations: List[str]) -> Tuple[str, List[str]]:
+        """
+        Draft one section from its most relevant citations.
+
+        Args:
+            paper: PaperBase object with title, description and citation content
+            section: Outline section, formatted as "key:section"
+            citations: Citations of the section, most relevant first
+
+        Returns:
+            Section body citing its sources as [n], and the citations of the sources in order
+        """
+        heading = section.partition(':')[0].strip()
+        points = self._points(paper, section)
+        query = self._query(paper, section)
+
+        # 先计算不含来源的提示词长度，剩余预算留给来源摘录
+        budget = self.context_tokens - estimate_tokens(
+            format_prompt("section_writer", paper=paper, section=heading, points=points, sources='')
+        )
+        sources: List[str] = []
+        excerpts: List[str] = []
+        for citation in citations:
+            if budget <= 0:
+                break
+            if citation not in paper.citation_content:
+                continue
+            text = self._excerpt(paper, citation, query, budget)
+            if not text:
+                continue
+            sources.append(citation)
+            excerpts.append(f"[{len(sources)}] {citation}\n{text}")
+            budget -= estimate_tokens(excerpts[-1]) + 1
+        metrics.incr('section_sources', len(sources))
+
+        prompt = format_prompt(
+            "section_writer", paper=paper, section=heading, points=points,
+            sources='\n\n'.join(excerpts) or 'None'
+        )
+        return self.model.query(prompt).strip(), sources
+
+    def _points(self, paper: PaperBase, section: str) -> str:
+        """Points a section should cover, from section_outline or the outline itself."""
+        points = paper.section_outline.get(section)
+        if points:
+            return '\n'.join(f"- {point}" for point in points)
+        return section.partition(':')[2].strip()
+
+    def _query(self, paper: PaperBase, section: str) -> str:
+        """Text the sources of a section are ranked against."""
+        return f"{section.partition(':')[0]} {self._points(paper, section)}"
+
+    def _excerpt(self, paper: PaperBase, citation: str, query: str, budget: int) -> str:
+        """
+        Select the passages of a citation's content most relevant to a section,
+        within excerpt_tokens and the remaining budget.
+
+        Args:
+            paper: PaperBase object with citation content
+            citation: Citation in citation_content
+            query: Text the passages are ranked against
+            budget: Estimated tokens left in the prompt
+
+        Returns:
+            Selected passages in document order, empty if the citation could not be crawled
+        """
+        from paper_writer.utils.bm25 import BM25Index
+
+        tokens = min(self.excerpt_tokens, budget - estimate_tokens(citation) - 2)
+        if tokens <= 0:
+            return ''
+        text = paper.citation_text(citation, max_chars=self.max_source_chars, store=self.content_store).strip()
+        # CrawlerComponent 为爬取失败的引用保存的占位内容
+        if not text or text.startswith('[Failed to crawl:'):
+            return ''
+
+        passages = self._split_passages(text)
+        relevance = BM25Index()
+        for passage in passages:
+            relevance.add(passage)
+        # 与章节无关的来源退回到文档开头的段落
+        ranked = relevance.top_k(query, len(passages)) or list(range(len(passages)))
+
+        selected: List[int] = []
+        used = 0
+        for number in ranked:
+            passage_tokens = estimate_tokens(passages[number]) + 1
+            if used + passage_tokens > tokens:
+                if selected:
+                    break
+                # 第一个段落就超出预算时截断它
+                passages[number] = passages[number][:len(passages[number]) * tokens // passage_tokens]
+            selected.append(number)
+            used += passage_tokens
+        return ' ... '.join(passages[number] for number in sorted(selected))
+
+    def _split_passages(self, text: str) -> List[str]:
+        """Split a text into passages of consecutive sentences of about passage_tokens each."""
+        passages: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for sentence in self._split_sentences(text):
+            tokens = estimate_tokens(sentence)
+            if current and current_tokens + tokens > self.passage_tokens:
+                passages.append(' '.join(current))
+                current, current_tokens = [], 0
+            if tokens > self.passage_tokens:
+                # 没有句末标点的长文本按长度切分
+                step = max(1, len(sentence) * self.passage_tokens // tokens)
+                passages.extend(sentence[start:start + step] for start in range(0, len(sentence), step))
+                continue
+            current.append(sentence)
+            current_tokens += tokens
+        if current:
+            passages.append(' '.join(current))
+        return passages
+
+    def _split_sentences(self, text: str) -> List[str]:
+        """Split a section body into its non-empty sentences."""
+        sentences = []
+        for paragraph in text.splitlines():
+            sentences.extend(sentence.strip() for sentence in _SENTENCE_END_RE.split(paragraph) if sentence.strip())
+        return sentences
+
+    def _assemble(self, paper: PaperBase, section_content: Dict[str, str], references: List[str]) -> str:
+        """
+        Join the sections in outline order, followed by the cited references.
+
+        Args:
+            paper: PaperBase object with title and outline
+            section_content: Body of each section
+            references: Cited citations, in order of their numbers
+
+        Returns:
+            Complete paper content in markdown
+        """
+        parts = [f"# {paper.title}"] if paper.title else []
+        for section in paper.outline:
+            heading = section.partition(':')[0].strip()
+            parts.append(f"## {heading}\n\n{section_content[section]}")
+        if references:
+            parts.append("## References\n\n" + '\n'.join(
+                f"[{number}] {citation}" for number, citation in enumerate(references, start=1)
+            ))
+        return '\n\n'.join(parts)
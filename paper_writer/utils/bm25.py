@@ -0,0 +1,132 @@
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 中文连续片段和其他语言的单词（不含下划线）
+_TOKEN_RE = re.compile(r'[\u4e00-\u9fff]+|[^\W_\u4e00-\u9fff]+')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into index terms.
+
+    Words of other languages are lowercased; runs of Chinese characters, which
+    have no spaces between words, become overlapping character bigrams.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Terms in order of appearance
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if _CJK_RE.match(token) and len(token) > 1:
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return terms
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 index.
+
+    Documents are kept as sparse term counts; a query is scored against all
+    documents at once with NumPy over the concatenated postings.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Strength of document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._vocabulary: Dict[str, int] = {}
+        self._doc_terms: List[np.ndarray] = []
+        self._doc_counts: List[np.ndarray] = []
+        # 拼接后的倒排数据，添加文档后失效，下次查询时重建
+        self._postings: Optional[tuple] = None
+
+    def add(self, text: str) -> int:
+        """
+        Add a document.
+
+        Args:
+            text: Text of the document
+
+        Returns:
+            Number of the document, counting from 0 in order of addition
+        """
+        term_ids = [self._vocabulary.setdefault(term, len(self._vocabulary)) for term in tokenize(text)]
+        terms, counts = np.unique(np.asarray(term_ids, dtype=np.int64), return_counts=True)
+        self._doc_terms.append(terms)
+        self._doc_counts.append(counts.astype(np.float64))
+        self._postings = None
+        return len(self._doc_terms) - 1
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        Score every document against a query.
+
+        Args:
+            query: Query text
+
+        Returns:
+            BM25 score of each document, indexed by document number
+        """
+        scores = np.zeros(len(self._doc_terms))
+        query_ids = [self._vocabulary[term] for term in tokenize(query) if term in self._vocabulary]
+        if not query_ids or not len(scores):
+            return scores
+        query_terms, query_counts = np.unique(np.asarray(query_ids, dtype=np.int64), return_counts=True)
+
+        docs, terms, counts, idf, norm = self._build_postings()
+        # 查询词在每个命中位置的出现次数，未命中的位置为 0
+        weights = np.zeros(len(self._vocabulary))
+        weights[query_terms] = query_counts
+        matched = weights[terms] > 0
+        tf = counts[matched]
+        contributions = idf[terms[matched]] * tf * (self.k1 + 1) / (tf + norm[docs[matched]])
+        np.add.at(scores, docs[matched], contributions * weights[terms[matched]])
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """
+        Numbers of the k documents that score highest against a query.
+
+        Documents that share no term with the query are never returned. Ties
+        are broken by document number.
+
+        Args:
+            query: Query text
+            k: Maximum number of documents to return
+
+        Returns:
+            Document numbers, best first
+        """
+        scores = self.score(query)
+        # 稳定排序保证同分时按文档编号
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [int(doc) for doc in order if scores[doc] > 0]
+
+    def _build_postings(self) -> tuple:
+        if self._postings is None:
+            lengths = np.array([counts.sum() for counts in self._doc_counts])
+            docs = np.repeat(np.arange(len(self._doc_terms)), [len(terms) for terms in self._doc_terms])
+            terms = np.concatenate(self._doc_terms) if self._doc_terms else np.empty(0, dtype=np.int64)
+            counts = np.concatenate(self._doc_counts) if self._doc_counts else np.empty(0)
+
+            doc_frequency = np.bincount(terms, minlength=len(self._vocabulary))
+            idf = np.log1p((len(self._doc_terms) - doc_frequency + 0.5) / (doc_frequency + 0.5))
+            average_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+            norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+            self._postings = (docs, terms, counts, idf, norm)
+        return self._postings
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
@@ -0,0 +1,364 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+# Default cache directory in the project root
+CACHE_DIR = Path(__file__).parent.parent.parent / '.cache'
+
+
+class ResponseCache:
+    """Persistent content-addressed cache for LLM responses, backed by SQLite."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 50000,
+        max_bytes: int = 512 * 1024 * 1024,
+        default_ttl: Optional[float] = None
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            path: Path to the SQLite file. Defaults to .cache/llm_responses.sqlite in the project root
+            max_entries: Maximum number of cached responses before LRU eviction
+            max_bytes: Maximum total size of cached responses before LRU eviction
+            default_ttl: Default time-to-live in seconds, None means entries never expire
+        """
+        if path is None:
+            path = CACHE_DIR / 'llm_responses.sqlite'
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                expires REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    @staticmethod
+    def make_key(model_name: str, base_url: str, prompt: str) -> str:
+        """Build the content address of a (model_name, base_url, prompt) triple."""
+        payload = json.dumps([model_name, base_url, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, model_name: str, base_url: str, prompt: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            model_name: Name of the model
+            base_url: Base URL of the model provider
+            prompt: Prompt sent to the model
+
+        Returns:
+            The cached response, or None on a miss or an expired entry
+        """
+        key = self.make_key(model_name, base_url, prompt)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                self.misses[model_name] += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits[model_name] += 1
+            return row[0]
+
+    def set(self, model_name: str, base_url: str, prompt: str, response: str, ttl: Optional[float] = None) -> None:
+        """
+        Store a response and evict old entries if the cache is over its limits.
+
+        Args:
+            model_name: Name of the model
+            base_url: Base URL of the model provider
+            prompt: Prompt sent to the model
+            response: Response to cache
+            ttl: Time-to-live in seconds, falls back to default_ttl
+        """
+        key = self.make_key(model_name, base_url, prompt)
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = now + ttl if ttl is not None else None
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed, expires) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, size, now, now, expires)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until within limits."""
+        self._conn.execute("DELETE FROM responses WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the limits so eviction does not run on every insert
+        max_entries = int(self.max_entries * 0.9)
+        max_bytes = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= max_entries and total <= max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self) -> None:
+        """Remove all cached responses and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self.hits.clear()
+            self.misses.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get hit/miss counters per model name."""
+        models = set(self.hits) | set(self.misses)
+        return {
+            model: {'hits': self.hits[model], 'misses': self.misses[model]}
+            for model in sorted(models)
+        }
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide default response cache."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+
+class CrawlCacheEntry(NamedTuple):
+    """A cached crawl of a single URL."""
+
+    url: str
+    body: bytes
+    markdown: str
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched: float
+    # Whether the markdown stopped early at a character budget
+    truncated: bool = False
+    # Citation metadata found in the page, as a dict of CitationMetadata fields
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class CrawlCache:
+    """Persistent cache of crawled pages, storing the raw body and derived markdown compressed."""
+
+    _ADDED_COLUMNS = {
+        'truncated': 'INTEGER NOT NULL DEFAULT 0',
+        'metadata': 'TEXT',
+    }
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = 1024 * 1024 * 1024,
+        max_age: float = 7 * 24 * 3600
+    ):
+        """
+        Initialize the crawl cache.
+
+        Args:
+            path: Path to the SQLite file. Defaults to .cache/crawl.sqlite in the project root
+            max_bytes: Maximum total compressed size before LRU eviction
+            max_age: Seconds an entry is served without revalidation, after that
+                it is revalidated with ETag/Last-Modified
+        """
+        if path is None:
+            path = CACHE_DIR / 'crawl.sqlite'
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # Pages served without network, pages revalidated with a 304, and URLs never crawled before
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                markdown BLOB NOT NULL,
+                truncated INTEGER NOT NULL DEFAULT 0,
+                metadata TEXT,
+                content_type TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                fetched REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)")
+        # Caches created by older versions lack the columns added since
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        for name, definition in self._ADDED_COLUMNS.items():
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE pages ADD COLUMN {name} {definition}")
+
+    def get(self, url: str) -> Optional[CrawlCacheEntry]:
+        """
+        Look up a cached page.
+
+        Args:
+            url: Crawled URL
+
+        Returns:
+            The cached entry, or None if the URL was never crawled
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, markdown, truncated, metadata, content_type, etag, last_modified, fetched "
+                "FROM pages WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE pages SET accessed = ? WHERE url = ?", (time.time(), url))
+
+        body, markdown, truncated, metadata, content_type, etag, last_modified, fetched = row
+        entry = CrawlCacheEntry(
+            url=url,
+            body=zlib.decompress(body),
+            markdown=zlib.decompress(markdown).decode('utf-8'),
+            content_type=content_type,
+            etag=etag,
+            last_modified=last_modified,
+            fetched=fetched,
+            truncated=bool(truncated),
+            metadata=json.loads(metadata) if metadata else None
+        )
+        if self.is_fresh(entry):
+            self.hits += 1
+        return entry
+
+    def is_fresh(self, entry: CrawlCacheEntry) -> bool:
+        """Whether an entry can be served without revalidation."""
+        return time.time() - entry.fetched < self.max_age
+
+    def set(
+        self,
+        url: str,
+        body: bytes,
+        markdown: str,
+        content_type: str = "",
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        truncated: bool = False,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Store a crawled page and evict least recently used pages if over max_bytes.
+
+        Args:
+            url: Crawled URL
+            body: Raw response body
+            markdown: Markdown derived from the body
+            content_type: Content-Type of the response
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            truncated: Whether the markdown stopped early at a character budget
+            metadata: Citation metadata found in the page
+        """
+        body_blob = zlib.compress(body)
+        markdown_blob = zlib.compress(markdown.encode('utf-8'))
+        metadata_text = json.dumps(metadata, ensure_ascii=False) if metadata else None
+        size = len(body_blob) + len(markdown_blob) + len(metadata_text or '')
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url, body, markdown, truncated, metadata, content_type, etag, last_modified, size, fetched, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url, body_blob, markdown_blob, int(truncated), metadata_text,
+                    content_type, etag, last_modified, size, now, now
+                )
+            )
+            self._evict()
+
+    def refresh(self, url: str) -> None:
+        """Mark a page as revalidated, e.g. after a 304 Not Modified response."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched = ?, accessed = ? WHERE url = ?", (now, now, url))
+            self.revalidated += 1
+
+    def _evict(self) -> None:
+        """Drop least recently used pages until the cache is within max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the limit so eviction does not run on every insert
+        max_bytes = int(self.max_bytes * 0.9)
+        stale = []
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY accessed ASC").fetchall():
+            if total <= max_bytes:
+                break
+            stale.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", stale)
+
+    def clear(self) -> None:
+        """Remove all cached pages."""
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+
+
+_default_crawl_cache: Optional[CrawlCache] = None
+
+
+def get_crawl_cache() -> CrawlCache:
+    """Get the process-wide default crawl cache."""
+    global _default_crawl_cache
+    with _default_lock:
+        if _default_crawl_cache is None:
+            _default_crawl_cache = CrawlCache()
+        return _default_crawl_cache
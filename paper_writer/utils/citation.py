@@ -0,0 +1,278 @@
+import io
+import json
+import re
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+_YEAR_RE = re.compile(r'(1[5-9]\d\d|20\d\d)')
+_DOI_RE = re.compile(r'10\.\d{4,9}/[^\s"<>]+')
+
+# GB/T 7714 中超过 3 位作者时只列前 3 位
+MAX_AUTHORS = 3
+
+class CitationMetadata(BaseModel):
+    """Bibliographic metadata found on a crawled page or in a PDF."""
+
+    title: str = ""
+    authors: List[str] = Field(default_factory=list)
+    journal: str = ""
+    conference: str = ""
+    publisher: str = ""
+    year: str = ""
+    volume: str = ""
+    issue: str = ""
+    first_page: str = ""
+    last_page: str = ""
+    doi: str = ""
+    arxiv_id: str = ""
+
+    @property
+    def container(self) -> str:
+        if self.journal:
+            return self.journal
+        if self.arxiv_id:
+            return f"arXiv preprint arXiv:{self.arxiv_id}"
+        return self.conference
+
+    def is_complete(self) -> bool:
+        """Whether there is enough metadata to format a GB/T 7714 reference locally."""
+        return bool(self.title and self.authors and self.year and self.container)
+
+def format_gbt7714(metadata: CitationMetadata) -> str:
+    """
+    Format a GB/T 7714-2015 reference from complete metadata.
+
+    Args:
+        metadata: Metadata with title, authors, year and a journal, conference or arXiv id
+
+    Returns:
+        The formatted reference
+    """
+    is_chinese = bool(_CJK_RE.search(metadata.title))
+    authors = [_format_author(author) for author in metadata.authors[:MAX_AUTHORS]]
+    if len(metadata.authors) > MAX_AUTHORS:
+        authors.append('等' if is_chinese else 'et al')
+    author_text = ', '.join(authors)
+
+    pages = metadata.first_page
+    if metadata.first_page and metadata.last_page:
+        pages = f"{metadata.first_page}-{metadata.last_page}"
+
+    if metadata.journal or metadata.arxiv_id:
+        reference = f"{author_text}. {metadata.title}[J]. {metadata.container}, {metadata.year}"
+        if metadata.volume:
+            reference += f", {metadata.volume}"
+            if metadata.issue:
+                reference += f"({metadata.issue})"
+    else:
+        reference = f"{author_text}. {metadata.title}[C]//{metadata.conference}. "
+        if metadata.publisher:
+            reference += f"{metadata.publisher}, "
+        reference += metadata.year
+    if pages:
+        reference += f": {pages}"
+    reference += '.'
+    if metadata.doi:
+        reference += f" DOI:{metadata.doi}."
+    return reference
+
+def _format_author(name: str) -> str:
+    """'Enric Galceran' 或 'Galceran, Enric' -> 'GALCERAN E'，中文姓名保持不变。"""
+    name = ' '.join(name.split())
+    if _CJK_RE.search(name):
+        return name.replace(' ', '')
+    if ',' in name:
+        last, _, first = name.partition(',')
+    else:
+        parts = name.split(' ')
+        last, first = parts[-1], ' '.join(parts[:-1])
+    initials = ' '.join(part[0].upper() for part in re.split(r'[\s.\-]+', first) if part)
+    return f"{last.strip().upper()} {initials}".strip()
+
+# HTML <meta> 名称到元数据字段的映射，包括 Highwire Press (citation_*) 和 Dublin Core
+_META_FIELDS = {
+    'citation_title': 'title',
+    'dc.title': 'title',
+    'citation_journal_title': 'journal',
+    'citation_conference_title': 'conference',
+    'citation_publisher': 'publisher',
+    'dc.publisher': 'publisher',
+    'citation_publication_date': 'date',
+    'citation_date': 'date',
+    'citation_online_date': 'date',
+    'dc.date': 'date',
+    'citation_volume': 'volume',
+    'citation_issue': 'issue',
+    'citation_firstpage': 'first_page',
+    'citation_lastpage': 'last_page',
+    'citation_doi': 'doi',
+    'citation_arxiv_id': 'arxiv_id',
+    'dc.identifier': 'identifier',
+}
+_META_AUTHORS = ('citation_author', 'dc.creator')
+_JSONLD_TYPES = ('ScholarlyArticle', 'Article', 'Report', 'Thesis', 'Chapter')
+
+def extract_html_metadata(soup: Any) -> CitationMetadata:
+    """
+    Extract citation metadata from the <meta> tags and JSON-LD of a parsed page.
+
+    Args:
+        soup: BeautifulSoup of the page
+
+    Returns:
+        Extracted metadata, fields missing from the page are left empty
+    """
+    values: Dict[str, str] = {}
+    authors: Dict[str, List[str]] = {name: [] for name in _META_AUTHORS}
+    for meta in soup.find_all('meta'):
+        name = (meta.get('name') or meta.get('property') or '').strip().lower()
+        content = ' '.join((meta.get('content') or '').split())
+        if not name or not content:
+            continue
+        if name in authors:
+            authors[name].append(content)
+        elif name in _META_FIELDS and _META_FIELDS[name] not in values:
+            values[_META_FIELDS[name]] = content
+
+    metadata = CitationMetadata(
+        title=values.get('title', ''),
+        authors=authors['citation_author'] or authors['dc.creator'],
+        journal=values.get('journal', ''),
+        conference=values.get('conference', ''),
+        publisher=values.get('publisher', ''),
+        year=_parse_year(values.get('date', '')),
+        volume=values.get('volume', ''),
+        issue=values.get('issue', ''),
+        first_page=values.get('first_page', ''),
+        last_page=values.get('last_page', ''),
+        doi=_parse_doi(values.get('doi', '') or values.get('identifier', '')),
+        arxiv_id=values.get('arxiv_id', ''),
+    )
+    return _merge(metadata, _extract_jsonld_metadata(soup))
+
+def _extract_jsonld_metadata(soup: Any) -> CitationMetadata:
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or '')
+        except ValueError:
+            continue
+        for item in _jsonld_items(data):
+            item_type = item.get('@type')
+            types = item_type if isinstance(item_type, list) else [item_type]
+            if not any(t in _JSONLD_TYPES for t in types):
+                continue
+            container = item.get('isPartOf') or {}
+            while isinstance(container, dict) and container.get('@type') in ('PublicationIssue', 'PublicationVolume'):
+                container = container.get('isPartOf') or {}
+            return CitationMetadata(
+                title=_jsonld_text(item.get('headline') or item.get('name')),
+                authors=[_jsonld_text(author) for author in _as_list(item.get('author')) if _jsonld_text(author)],
+                journal=_jsonld_text(container),
+                publisher=_jsonld_text(item.get('publisher')),
+                year=_parse_year(_jsonld_text(item.get('datePublished'))),
+                first_page=_jsonld_text(item.get('pageStart')),
+                last_page=_jsonld_text(item.get('pageEnd')),
+                doi=_parse_doi(' '.join(_jsonld_text(i) for i in _as_list(item.get('identifier')) + _as_list(item.get('sameAs')))),
+            )
+    return CitationMetadata()
+
+def extract_pdf_metadata(pdf_bytes: bytes) -> CitationMetadata:
+    """
+    Extract citation metadata from the document information dictionary of a PDF.
+
+    The dictionary has no container or publication year, so the result is
+    never complete and only serves as hints for the generated citation.
+
+    Args:
+        pdf_bytes: Raw PDF content
+
+    Returns:
+        Extracted metadata, empty if the PDF has no usable document information
+    """
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+    from pdfminer.utils import decode_text
+
+    def text(value: Any) -> str:
+        value = resolve1(value)
+        if isinstance(value, bytes):
+            return ' '.join(decode_text(value).split())
+        return ''
+
+    try:
+        with io.BytesIO(pdf_bytes) as pdf_file:
+            document = PDFDocument(PDFParser(pdf_file))
+            info = resolve1(document.info[0]) if document.info else {}
+    except Exception:
+        return CitationMetadata()
+
+    authors = re.split(r'\s*(?:[;,]|\band\b)\s*', text(info.get('Author')))
+    # CreationDate 是生成文件的时间，可能是预印本、修订或下载时重新生成的日期，不作为出版年份
+    return CitationMetadata(
+        title=text(info.get('Title')),
+        authors=[author for author in authors if author],
+        doi=_parse_doi(text(info.get('Subject'))),
+    )
+
+def format_metadata_hints(metadata: CitationMetadata) -> str:
+    """
+    Format the known fields of incomplete metadata for a citation prompt.
+
+    Args:
+        metadata: Metadata found on a page or in a PDF
+
+    Returns:
+        One "Field: value" line per non-empty field, empty if no field is known
+    """
+    fields = [
+        ('Title', metadata.title),
+        ('Authors', '; '.join(metadata.authors)),
+        ('Journal', metadata.journal),
+        ('Conference', metadata.conference),
+        ('Publisher', metadata.publisher),
+        ('Year', metadata.year),
+        ('Volume', metadata.volume),
+        ('Issue', metadata.issue),
+        ('Pages', '-'.join(page for page in (metadata.first_page, metadata.last_page) if page)),
+        ('DOI', metadata.doi),
+        ('arXiv', metadata.arxiv_id),
+    ]
+    return '\n'.join(f"{name}: {value}" for name, value in fields if value)
+
+def _merge(primary: CitationMetadata, fallback: CitationMetadata) -> CitationMetadata:
+    """用 fallback 填充 primary 中为空的字段。"""
+    updates = {
+        name: value for name, value in fallback.model_dump().items()
+        if value and not getattr(primary, name)
+    }
+    return primary.model_copy(update=updates)
+
+def _parse_year(date: str) -> str:
+    match = _YEAR_RE.search(date or '')
+    return match.group(1) if match else ''
+
+def _parse_doi(value: str) -> str:
+    match = _DOI_RE.search(value or '')
+    return match.group(0).rstrip('.,;') if match else ''
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def _jsonld_items(data: Any) -> List[Dict[str, Any]]:
+    items = []
+    for item in _as_list(data):
+        if isinstance(item, dict):
+            items.append(item)
+            items.extend(i for i in _as_list(item.get('@graph')) if isinstance(i, dict))
+    return items
+
+def _jsonld_text(value: Any) -> str:
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('@value') or ''
+    if isinstance(value, list):
+        value = value[0] if value else ''
+    return ' '.join(str(value).split()) if value else ''
@@ -1,6 +1,35 @@
 import re
+import unicodedata
 from cleantext import clean
+from cleantext.clean import normalize_whitespace
+from cleantext.constants import CURRENCY_REGEX, EMAIL_REGEX, PHONE_REGEX, URL_REGEX
+from ftfy import fix_encoding, fixes
+from ftfy.chardata import CONTROL_CHARS, LIGATURES, WIDTH_MAP
 from html import unescape
+from paper_writer.utils.metrics import metrics
+
+# 预编译的正则，供 full_clean_pipeline 使用
+_TAG_OR_SURROGATE_RE = re.compile(r'<[^>]+>|[\ud800-\udfff]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_DISALLOWED_RE = re.compile(r'[^\w\u4e00-\u9fff\s,.!?，。！？、]')
+_REPEATED_PUNCT_RE = re.compile(r'([,.!?，。！？])\1+')
+# 只含这些字符的文本经过 ftfy 后，只有全角标点会被转为半角
+_FTFY_UNSAFE_RE = re.compile(r'[^\x00-\x7f\u4e00-\u9fff，。！？、]')
+_FULLWIDTH_PUNCT = str.maketrans('，！？', ',!?')
+
+def _char_class(table: dict) -> re.Pattern:
+    return re.compile('[' + ''.join(re.escape(chr(code)) for code in table) + ']')
+
+# ftfy 的逐字符替换表，只有文本中出现表内字符时才需要执行 translate
+_LIGATURES_RE = _char_class(LIGATURES)
+_WIDTH_RE = _char_class(WIDTH_MAP)
+_CONTROL_RE = _char_class(CONTROL_CHARS)
+# clean-text 的 URL 和 Email 正则能匹配的必要条件
+_URL_HINT_RE = re.compile(r'https?://|ftp://|www', re.IGNORECASE)
+_EMAIL_HINT_RE = re.compile(r'[@(<{\[]')
+# 与 ftfy 的默认分段长度一致
+_FTFY_SEGMENT_LENGTH = 1000000
+
 def clean_text(text: str) -> str:
     # 去除前后空白字符
     text = text.strip()
@@ -63,7 +92,10 @@ def clean_chinese_text(text: str) -> str:
     
     return text.strip()
 
-def full_clean_pipeline(text: str) -> str:
+def reference_clean_pipeline(text: str) -> str:
+    """
+    原始的多遍清洗流程，作为 full_clean_pipeline 输出一致性的参照。
+    """
     # 处理HTML内容
     text = clean_html_content(text)
     
@@ -79,4 +111,71 @@ def full_clean_pipeline(text: str) -> str:
     # 高级清理
     text = advanced_clean(text)
     
-    return text
\ No newline at end of file
+    return text
+
+@metrics.timed('clean')
+def full_clean_pipeline(text: str) -> str:
+    """
+    清洗爬取的文本，输出与 reference_clean_pipeline 一致，但合并了各步骤的遍历：
+    - 去除 HTML 标签和无法编码的代理字符合为一次替换
+    - 字符过滤后的文本只含单词字符、中文、空格和少量标点，
+      因此不可见字符过滤和中文字符过滤都不会再改变文本
+    - 只含 ASCII、中文和中文标点的文本跳过 ftfy，只把全角标点转为半角，也不可能含有 Email
+    """
+    # 处理HTML内容和编码问题
+    text = unescape(text)
+    text = _TAG_OR_SURROGATE_RE.sub('', text)
+
+    # 合并空白并去除特殊字符（保留中文、英文、数字和基本标点）
+    text = _WHITESPACE_RE.sub(' ', text).strip()
+    text = _DISALLOWED_RE.sub('', text)
+
+    # 去除重复标点
+    text = _REPEATED_PUNCT_RE.sub(r'\1', text).strip()
+
+    if _FTFY_UNSAFE_RE.search(text) is None:
+        text = text.translate(_FULLWIDTH_PUNCT)
+        text = CURRENCY_REGEX.sub('', text)
+        if _URL_HINT_RE.search(text):
+            text = URL_REGEX.sub('', text)
+        text = PHONE_REGEX.sub('', text)
+        return _WHITESPACE_RE.sub(' ', text).strip()
+
+    # 含其他 Unicode 字符时按 clean-text 的顺序完整处理
+    text = ''.join(
+        _fix_unicode(text[pos:pos + _FTFY_SEGMENT_LENGTH])
+        for pos in range(0, len(text), _FTFY_SEGMENT_LENGTH)
+    )
+    text = CURRENCY_REGEX.sub('', text)
+    if _URL_HINT_RE.search(text):
+        text = URL_REGEX.sub('', text)
+    if _EMAIL_HINT_RE.search(text):
+        text = EMAIL_REGEX.sub('', text)
+    text = PHONE_REGEX.sub('', text)
+    return normalize_whitespace(text, no_line_breaks=True)
+
+def _fix_unicode(text: str) -> str:
+    """
+    与 clean-text 的 fix_bad_unicode 结果一致，用于已去除换行、反斜杠、'&' 和 '<' 的文本：
+    - 没有反斜杠时，unicode-escape 往返和 HTML 实体还原都不会改变文本
+    - ftfy 中基于 translate 的修复只在文本含有表内字符时执行
+    """
+    while True:
+        original = text
+        if '&' in text:
+            text = fixes.unescape_html(text)
+        text = fix_encoding(text)
+        text = fixes.fix_c1_controls(text)
+        if _LIGATURES_RE.search(text):
+            text = fixes.fix_latin_ligatures(text)
+        if _WIDTH_RE.search(text):
+            text = fixes.fix_character_width(text)
+        text = fixes.uncurl_quotes(text)
+        text = fixes.fix_line_breaks(text)
+        text = fixes.fix_surrogates(text)
+        text = fixes.remove_terminal_escapes(text)
+        if _CONTROL_RE.search(text):
+            text = fixes.remove_control_chars(text)
+        text = unicodedata.normalize('NFC', text)
+        if text == original:
+            return text
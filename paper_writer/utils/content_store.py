@@ -0,0 +1,198 @@
+import hashlib
+import mmap
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from paper_writer.utils.cache import CACHE_DIR
+
+_HANDLE_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ContentStore:
+    """
+    Content-addressed store for large texts such as crawled citation bodies, kept on disk.
+
+    Each text is written once to a UTF-8 file named after its SHA-256 digest,
+    and the digest is the handle passed around instead of the text. Files are
+    never modified after they are written, so readers can mmap them.
+
+    Texts older than max_age are removed when the store is opened, and the
+    least recently stored texts are removed once the files exceed max_bytes.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = 1024 * 1024 * 1024,
+        max_age: Optional[float] = 7 * 24 * 3600
+    ):
+        """
+        Initialize the content store.
+
+        Args:
+            path: Directory of the stored files. Defaults to .cache/content in the project root
+            max_bytes: Maximum total size of the stored files before the least
+                recently stored ones are removed
+            max_age: Seconds since a text was last stored after which it is
+                removed, None means no expiry
+        """
+        self.path = Path(path) if path is not None else CACHE_DIR / 'content'
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # 目录中文件的总大小，由 _sweep() 重新统计，其间按写入的字节数累加
+        self._total = 0
+        self._sweep()
+
+    @staticmethod
+    def is_handle(value: str) -> bool:
+        """Whether value looks like a handle returned by put()."""
+        return _HANDLE_RE.match(value) is not None
+
+    def put(self, text: str) -> str:
+        """
+        Store a text.
+
+        Args:
+            text: Text to store
+
+        Returns:
+            Handle of the text, the same for equal texts
+        """
+        data = text.encode('utf-8')
+        handle = hashlib.sha256(data).hexdigest()
+        path = self._path(handle)
+        try:
+            # 已存储的文本更新修改时间，淘汰时按最近一次存储的时间排序
+            os.utime(path)
+            return handle
+        except FileNotFoundError:
+            pass
+        path.parent.mkdir(exist_ok=True)
+        # 先写临时文件再替换，读者不会看到写了一半的文件
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total += len(data)
+            over = self._total > self.max_bytes
+        if over:
+            self._sweep()
+        return handle
+
+    def get(self, handle: str, max_chars: Optional[int] = None) -> str:
+        """
+        Read a stored text.
+
+        Args:
+            handle: Handle returned by put()
+            max_chars: Maximum number of characters to return, None for the whole text
+
+        Returns:
+            The stored text
+
+        Raises:
+            KeyError: If no text is stored under the handle
+        """
+        with self.open(handle) as data:
+            if max_chars is None:
+                return bytes(data).decode('utf-8')
+            # UTF-8 每个字符最多 4 个字节，只解码需要的前缀
+            return bytes(data[:max_chars * 4]).decode('utf-8', errors='ignore')[:max_chars]
+
+    @contextmanager
+    def open(self, handle: str) -> Iterator[Union[mmap.mmap, bytes]]:
+        """
+        Map a stored text into memory without reading it.
+
+        Args:
+            handle: Handle returned by put()
+
+        Yields:
+            Read-only mmap of the UTF-8 bytes of the text, or b'' for an empty text
+
+        Raises:
+            KeyError: If no text is stored under the handle
+        """
+        try:
+            f = open(self._path(handle), 'rb')
+        except FileNotFoundError:
+            raise KeyError(f"Content not found: {handle}") from None
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # 空文件不能 mmap
+                yield b''
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+    def size(self, handle: str) -> int:
+        """Size in bytes of a stored text."""
+        try:
+            return self._path(handle).stat().st_size
+        except FileNotFoundError:
+            raise KeyError(f"Content not found: {handle}") from None
+
+    def __contains__(self, handle: str) -> bool:
+        return self.is_handle(handle) and self._path(handle).exists()
+
+    def _sweep(self) -> None:
+        """Remove expired texts, then the least recently stored ones until within max_bytes."""
+        with self._lock:
+            now = time.time()
+            files = []
+            for directory in self.path.iterdir():
+                if not directory.is_dir():
+                    continue
+                for entry in os.scandir(directory):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    # 其他线程或进程写了一半的临时文件不能删除，过期的除外
+                    if self.max_age is not None and now - stat.st_mtime > self.max_age:
+                        self._remove(entry.path)
+                    elif not entry.name.endswith('.tmp'):
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            if total > self.max_bytes:
+                # 淘汰到上限的 90%，避免每次写入都要重新扫描
+                max_bytes = int(self.max_bytes * 0.9)
+                for _, size, file_path in sorted(files):
+                    if total <= max_bytes:
+                        break
+                    self._remove(file_path)
+                    total -= size
+            self._total = total
+
+    @staticmethod
+    def _remove(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+    def _path(self, handle: str) -> Path:
+        if not self.is_handle(handle):
+            raise KeyError(f"Invalid content handle: {handle!r}")
+        return self.path / handle[:2] / handle
+
+
+_default_store: Optional[ContentStore] = None
+_default_lock = threading.Lock()
+
+
+def get_content_store() -> ContentStore:
+    """Get the process-wide default content store."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ContentStore()
+        return _default_store
@@ -1,33 +1,467 @@
 import requests
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
 import io
-from pdfminer.high_level import extract_text
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from pydantic import BaseModel
+from paper_writer.utils.session import get_session
+from paper_writer.utils.cache import CrawlCache, CrawlCacheEntry, get_crawl_cache
+from paper_writer.utils.metrics import metrics
+from paper_writer.utils.citation import CitationMetadata, extract_html_metadata, extract_pdf_metadata
+from paper_writer.utils.html_extract import html_to_markdown, parse_html
+from paper_writer.utils.parser_pool import ParserPool, get_parser_pool
 
-def crawl_url(url: str) -> str:
+# 单个响应体默认最多下载 20MB
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# 可以解析的内容类型
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'text/xml', 'application/xml')
+PDF_CONTENT_TYPES = ('application/pdf', 'application/x-pdf')
+
+class CrawlError(Exception):
+    """Base class for crawl failures that are not HTTP errors."""
+
+class UnsupportedContentError(CrawlError):
+    """Raised when a response is a binary type that cannot be converted to text."""
+
+class ContentTooLargeError(CrawlError):
+    """Raised when a response that cannot be truncated exceeds the byte cap."""
+
+class ParseTimeoutError(CrawlError):
+    """Raised when parsing a document exceeds its CPU-time limit."""
+
+class PageContent(NamedTuple):
+    """Parsed content of a crawled page."""
+
+    markdown: str
+    # PDF 因字符预算提前停止了解析
+    truncated: bool = False
+    metadata: Optional[CitationMetadata] = None
+    # full_clean_pipeline 清洗后的文本，只在请求时生成，不写入缓存
+    clean_text: Optional[str] = None
+
+def crawl_url(
+    url: str,
+    session: Optional[requests.Session] = None,
+    timeout: float = 10,
+    cache: Optional[CrawlCache] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_chars: Optional[int] = None
+) -> str:
     """
     爬取指定 URL 的内容。
     - HTML: 转为 markdown
     - PDF: 解析为文本并转为 markdown
-    返回 markdown 文本，若失败抛出异常。
+    返回 markdown 文本，HTTP 错误返回空字符串，其他失败抛出异常。
     """
-    resp = requests.get(url, timeout=10)
     try:
-        resp.raise_for_status()
-    except:
+        return fetch_url(url, session=session, timeout=timeout, cache=cache, max_bytes=max_bytes, max_chars=max_chars)
+    except requests.HTTPError:
         return ''
-    content_type = resp.headers.get('Content-Type', '').lower()
-    if 'application/pdf' in content_type or url.lower().endswith('.pdf'):
+
+def fetch_url(
+    url: str,
+    session: Optional[requests.Session] = None,
+    timeout: float = 10,
+    cache: Optional[CrawlCache] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_chars: Optional[int] = None
+) -> str:
+    """
+    爬取指定 URL 的内容并转为 markdown，任何失败（包括 HTTP 错误）都抛出异常。
+    """
+    return fetch_page(url, session=session, timeout=timeout, cache=cache, max_bytes=max_bytes, max_chars=max_chars).markdown
+
+def fetch_page(
+    url: str,
+    session: Optional[requests.Session] = None,
+    timeout: float = 10,
+    cache: Optional[CrawlCache] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_chars: Optional[int] = None,
+    parser: Optional[ParserPool] = None,
+    clean: bool = False
+) -> PageContent:
+    """
+    爬取指定 URL 的内容，返回 markdown 以及页面中的引用元数据，任何失败（包括 HTTP 错误）都抛出异常。
+    给定 cache 时，新鲜的缓存直接返回，过期的缓存用 ETag/Last-Modified 重新验证，
+    304 时跳过下载和解析。
+
+    响应以流的方式下载，最多读取 max_bytes 字节；PDF 逐页解析，
+    得到 max_chars 个字符后即停止。
+
+    给定 parser 时，解析和清洗在其工作进程中执行；clean 为真时同时返回清洗后的文本。
+    """
+    downloaded = _download(url, session, timeout, cache, max_bytes, max_chars)
+    return _parse_download(url, downloaded, cache, max_chars, parser, clean)
+
+class _Download(NamedTuple):
+    """Raw response of a URL that still has to be parsed."""
+
+    content_type: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+def _download(
+    url: str,
+    session: Optional[requests.Session],
+    timeout: float,
+    cache: Optional[CrawlCache],
+    max_bytes: int,
+    max_chars: Optional[int]
+) -> Union[PageContent, _Download]:
+    """
+    fetch_page 中占用网络的一半：可用的缓存直接返回 PageContent，否则返回待解析的原始响应。
+    """
+    entry = cache.get(url) if cache is not None else None
+    # 缓存的文本若在更小的字符预算下被截断过，需要用缓存的原始内容重新解析
+    reusable = entry is not None and _covers_budget(entry.markdown, entry.truncated, max_chars)
+    if reusable and cache.is_fresh(entry):
+        metrics.incr('crawl_cache_hits', host=_host(url))
+        return _cached_page(entry)
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+    with (session or requests).get(url, headers=headers, timeout=timeout, stream=True) as resp:
+        if entry is not None and resp.status_code == 304:
+            cache.refresh(url)
+            metrics.incr('crawl_revalidated', host=_host(url))
+            if reusable:
+                return _cached_page(entry)
+            return _Download(entry.content_type, entry.body, entry.etag, entry.last_modified)
+
+        resp.raise_for_status()
+        content_type = resp.headers.get('Content-Type', '').lower()
+        body = _read_body(url, resp, content_type, max_bytes)
+        metrics.incr('crawl_bytes', len(body), host=_host(url))
+        return _Download(content_type, body, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+
+def _parse_download(
+    url: str,
+    downloaded: Union[PageContent, _Download],
+    cache: Optional[CrawlCache],
+    max_chars: Optional[int],
+    parser: Optional[ParserPool],
+    clean: bool
+) -> PageContent:
+    """
+    fetch_page 中占用 CPU 的一半：解析原始响应并写入缓存，按需清洗文本。
+    """
+    if isinstance(downloaded, PageContent):
+        page = downloaded
+    else:
+        if parser is not None:
+            page = parser.parse(url, downloaded.content_type, downloaded.body, max_chars=max_chars, clean=clean)
+        else:
+            page = parse_content(url, downloaded.content_type, downloaded.body, max_chars=max_chars)
+        if cache is not None:
+            cache.set(
+                url,
+                downloaded.body,
+                page.markdown,
+                content_type=downloaded.content_type,
+                etag=downloaded.etag,
+                last_modified=downloaded.last_modified,
+                truncated=page.truncated,
+                metadata=page.metadata.model_dump() if page.metadata is not None else None
+            )
+
+    if clean and page.clean_text is None:
+        if parser is not None:
+            clean_text = parser.clean(page.markdown)
+        else:
+            from paper_writer.utils.cleaner import full_clean_pipeline
+            clean_text = full_clean_pipeline(page.markdown)
+        page = page._replace(clean_text=clean_text)
+    return page
+
+def _cached_page(entry: CrawlCacheEntry) -> PageContent:
+    metadata = CitationMetadata(**entry.metadata) if entry.metadata else None
+    return PageContent(entry.markdown, entry.truncated, metadata)
+
+def _covers_budget(markdown: str, truncated: bool, max_chars: Optional[int]) -> bool:
+    """判断缓存的文本是否足以满足本次的字符预算。"""
+    if not truncated:
+        return True
+    return max_chars is not None and len(markdown) >= max_chars
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+def _is_pdf(url: str, content_type: str, head: bytes = b'') -> bool:
+    return (
+        any(t in content_type for t in PDF_CONTENT_TYPES)
+        or url.lower().endswith('.pdf')
+        or head.startswith(b'%PDF-')
+    )
+
+def _is_html(content_type: str, head: bytes = b'') -> bool:
+    if any(t in content_type for t in HTML_CONTENT_TYPES):
+        return True
+    # 没有声明类型或声明为通用二进制时，根据内容嗅探
+    if content_type == '' or 'octet-stream' in content_type:
+        sample = head.lstrip()[:256].lower()
+        return sample.startswith((b'<!doctype html', b'<html', b'<?xml', b'<head', b'<body'))
+    return False
+
+def _is_html_page(content_type: str, head: bytes = b'') -> bool:
+    if 'html' in content_type:
+        return True
+    # 未声明类型时，根据内容判断是否为 HTML 页面（而非 XML）
+    if content_type == '' or 'octet-stream' in content_type:
+        return head.lstrip()[:256].lower().startswith((b'<!doctype html', b'<html', b'<head', b'<body'))
+    return False
+
+def _read_body(url: str, resp: requests.Response, content_type: str, max_bytes: int) -> bytes:
+    """
+    以流的方式读取响应体。
+    首个数据块用于嗅探内容类型，无法解析的二进制内容在继续下载前即被拒绝；
+    超过 max_bytes 时 HTML 被截断，PDF 被拒绝（截断的 PDF 无法解析）。
+    """
+    declared = resp.headers.get('Content-Length')
+    chunks = resp.iter_content(chunk_size=CHUNK_SIZE)
+    head = next(chunks, b'')
+
+    if _is_pdf(url, content_type, head):
+        if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+            raise ContentTooLargeError(f"PDF of {declared} bytes exceeds the {max_bytes} byte cap: {url}")
+        is_pdf = True
+    elif _is_html(content_type, head):
+        is_pdf = False
+    else:
+        raise UnsupportedContentError(f"Unsupported content type '{content_type}': {url}")
+
+    buffer = bytearray(head)
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            if is_pdf:
+                raise ContentTooLargeError(f"PDF exceeds the {max_bytes} byte cap: {url}")
+            del buffer[max_bytes:]
+            break
+    return bytes(buffer)
+
+def parse_content(url: str, content_type: str, body: bytes, max_chars: Optional[int] = None) -> PageContent:
+    """
+    将响应内容解析为 markdown，同时提取页面中的引用元数据。
+    HTML 只解析一次：元数据和正文提取复用同一个 soup，markdown 直接由 soup 生成。
+    """
+    if _is_pdf(url, content_type, body[:8]):
         # 处理 PDF
-        pdf_bytes = resp.content
-        with io.BytesIO(pdf_bytes) as pdf_file:
-            text = extract_text(pdf_file)
+        text, truncated = _extract_pdf_text(body, max_chars)
         # 简单转为 markdown（每段落加空行）
         markdown = '\n\n'.join([line.strip() for line in text.splitlines() if line.strip()])
-        return markdown
+        return PageContent(markdown, truncated, extract_pdf_metadata(body))
     else:
-        # 处理 HTML
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        html = str(soup)
-        markdown = md(html)
-        return markdown
\ No newline at end of file
+        # 处理 HTML，未声明编码时交由 BeautifulSoup 根据内容检测
+        encoding = requests.utils.get_encoding_from_headers({'content-type': content_type})
+        if encoding == 'ISO-8859-1' and 'charset' not in content_type:
+            encoding = None
+        # 纯文本和 XML 没有页面结构，仍用 html.parser 整体转换
+        is_page = _is_html_page(content_type, body[:256])
+        soup = parse_html(body, encoding, parser=None if is_page else 'html.parser')
+        # 元数据在 <head> 和 JSON-LD 脚本中，须在删除页面模板之前提取
+        metadata = extract_html_metadata(soup)
+        markdown = html_to_markdown(soup, main_content=is_page)
+        return PageContent(markdown, False, metadata)
+
+def _extract_pdf_text(pdf_bytes: bytes, max_chars: Optional[int] = None) -> Tuple[str, bool]:
+    """
+    逐页解析 PDF，累计得到 max_chars 个字符后停止解析剩余页面。
+    """
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    pages = []
+    total = 0
+    with io.BytesIO(pdf_bytes) as pdf_file:
+        for page_layout in extract_pages(pdf_file):
+            page_text = ''.join(
+                element.get_text() for element in page_layout if isinstance(element, LTTextContainer)
+            )
+            pages.append(page_text)
+            total += len(page_text)
+            if max_chars is not None and total >= max_chars:
+                return '\n'.join(pages), True
+    return '\n'.join(pages), False
+
+class CrawlResult(BaseModel):
+    """Result of crawling a single URL."""
+
+    url: str
+    text: str = ""
+    error: Optional[str] = None
+    metadata: Optional[CitationMetadata] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class CrawlEngine:
+    """Crawl batches of URLs concurrently over a pooled session with per-host politeness limits."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        per_host_limit: int = 2,
+        timeout: float = 10,
+        session: Optional[requests.Session] = None,
+        cache: Optional[CrawlCache] = None,
+        use_cache: bool = True,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        parser_pool: Optional[ParserPool] = None,
+        use_parser_pool: bool = False
+    ):
+        """
+        Initialize the crawl engine.
+
+        Args:
+            max_concurrency: Maximum number of requests in flight across all hosts,
+                shared by concurrent crawl() calls on the same engine
+            per_host_limit: Maximum number of requests in flight to a single host
+            timeout: Timeout of a single request in seconds
+            session: Session to crawl with, defaults to the shared crawler session
+            cache: Crawl cache to use, defaults to the shared crawl cache
+            use_cache: Whether to use a crawl cache at all
+            max_bytes: Maximum number of bytes downloaded per URL
+            parser_pool: Process pool that parses and cleans the downloaded pages,
+                defaults to the shared parser pool when use_parser_pool is set
+            use_parser_pool: Whether to parse in a process pool, otherwise pages
+                are parsed in the crawling threads. The pool spawns worker processes,
+                so the calling script needs an if __name__ == "__main__" guard
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self.timeout = timeout
+        self.session = session or get_session("crawler", pool_size=self.max_concurrency)
+        self.cache = (cache or get_crawl_cache()) if use_cache else None
+        self.max_bytes = max_bytes
+        self.parser_pool = parser_pool or (get_parser_pool() if use_parser_pool else None)
+        self._slots = threading.Semaphore(self.max_concurrency)
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def crawl(self, urls: List[str], max_chars: Optional[int] = None) -> List[CrawlResult]:
+        """
+        Crawl a batch of URLs concurrently.
+
+        Args:
+            urls: URLs to crawl
+            max_chars: Character budget per URL, PDF parsing stops once it is reached
+
+        Returns:
+            One CrawlResult per input URL, in input order. Failures are
+            reported through CrawlResult.error instead of raising.
+        """
+        results: List[Optional[CrawlResult]] = [None] * len(urls)
+        for index, result in self.iter_crawl(urls, max_chars=max_chars, window=max(1, len(urls))):
+            results[index] = result
+        return results
+
+    def iter_crawl(
+        self,
+        urls: List[str],
+        max_chars: Optional[int] = None,
+        window: Optional[int] = None,
+        clean: bool = False
+    ) -> Iterator[Tuple[int, CrawlResult]]:
+        """
+        Crawl URLs concurrently, yielding results as a bounded stream.
+
+        At most window URLs are crawling or waiting to be consumed at any time,
+        so the memory held by crawled pages does not grow with the number of URLs.
+
+        Args:
+            urls: URLs to crawl
+            max_chars: Character budget per URL, PDF parsing stops once it is reached
+            window: Maximum number of results in flight or unconsumed, defaults
+                to twice max_concurrency
+            clean: Whether CrawlResult.text is the text cleaned by full_clean_pipeline
+                instead of the markdown, cleaned alongside the parsing
+
+        Yields:
+            (index into urls, CrawlResult) pairs, in host-interleaved order
+        """
+        window = max(1, window or 2 * self.max_concurrency)
+        order = iter(self._interleave_hosts(urls))
+        pending: deque = deque()
+        executor = ThreadPoolExecutor(max_workers=self.thread_count(window))
+        try:
+            for index in order:
+                pending.append((index, executor.submit(self.crawl_one, urls[index], max_chars, clean)))
+                if len(pending) >= window:
+                    break
+            while pending:
+                index, future = pending.popleft()
+                result = future.result()
+                next_index = next(order, None)
+                if next_index is not None:
+                    pending.append((next_index, executor.submit(self.crawl_one, urls[next_index], max_chars, clean)))
+                yield index, result
+        finally:
+            # 消费者提前停止时取消尚未开始的爬取
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def thread_count(self, window: int) -> int:
+        """Number of threads that keep window crawls busy, counting the ones waiting on the parser pool."""
+        # 解析时线程已释放网络槽位，多出的线程让下载在解析期间继续进行
+        parsers = self.parser_pool.max_workers if self.parser_pool is not None else 0
+        return max(1, min(self.max_concurrency + parsers, window))
+
+    def crawl_one(self, url: str, max_chars: Optional[int] = None, clean: bool = False) -> CrawlResult:
+        """
+        Crawl a single URL in the calling thread, within the engine's concurrency limits.
+
+        Args:
+            url: URL to crawl
+            max_chars: Character budget, PDF parsing stops once it is reached
+            clean: Whether CrawlResult.text is the cleaned text instead of the markdown
+
+        Returns:
+            Result of the crawl, failures are reported through CrawlResult.error
+        """
+        with metrics.span('crawl', host=_host(url)):
+            try:
+                # 只有下载占用网络槽位，解析期间其他 URL 可以继续下载
+                with self._host_slot(url), self._slots:
+                    downloaded = _download(url, self.session, self.timeout, self.cache, self.max_bytes, max_chars)
+                page = _parse_download(url, downloaded, self.cache, max_chars, self.parser_pool, clean)
+            except Exception as e:
+                return CrawlResult(url=url, error=f"{type(e).__name__}: {e}")
+        return CrawlResult(url=url, text=page.clean_text if clean else page.markdown, metadata=page.metadata)
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = _host(url)
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.Semaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    @staticmethod
+    def _interleave_hosts(urls: List[str]) -> List[int]:
+        """
+        Order URL indices round-robin across hosts, so that workers waiting on
+        one busy host do not hold up the other hosts.
+        """
+        by_host: Dict[str, deque] = defaultdict(deque)
+        for index, url in enumerate(urls):
+            by_host[_host(url)].append(index)
+
+        order = []
+        queues = list(by_host.values())
+        while queues:
+            for queue in queues:
+                order.append(queue.popleft())
+            queues = [queue for queue in queues if queue]
+        return order
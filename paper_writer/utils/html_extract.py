@@ -0,0 +1,161 @@
+import re
+from importlib.util import find_spec
+from typing import Any, Optional
+
+# 安装了 lxml 时用它解析 HTML，比 html.parser 快数倍；未安装时退回标准库解析器
+HTML_PARSER = 'lxml' if find_spec('lxml') is not None else 'html.parser'
+
+# 不含正文的标签，整体删除
+_JUNK_TAGS = (
+    'script', 'style', 'noscript', 'template', 'iframe', 'object', 'embed', 'svg', 'canvas',
+    'button', 'input', 'select', 'textarea', 'nav', 'aside', 'footer', 'dialog',
+)
+
+_JUNK_ROLES = ('navigation', 'banner', 'contentinfo', 'complementary', 'search', 'dialog', 'alertdialog')
+
+# 区块名称后常见的修饰词，例如 share-buttons、cookie-banner、related-posts
+_WIDGET_WORDS = (
+    r'area|articles?|banner|bar|block|box|btn|buttons?|container|content|dialog|email|facebook|form|icons|inner'
+    r'|linkedin|links?|list|modal|notice|panel|posts|sdk|stories|tools|twitter|wechat|weibo|widget|wrap(?:per)?'
+)
+
+def _name_re(keywords: str) -> "re.Pattern[str]":
+    # 整个 class 名或 id 匹配：前面可以有前缀，后面只能跟修饰词，related-work 之类的章节名不会命中
+    return re.compile(rf'^(?:[a-z0-9]+[-_])*(?:{keywords})(?:[-_](?:{_WIDGET_WORDS}))*$', re.IGNORECASE)
+
+# class 或 id 命中即删除：Cookie 提示、分享按钮、相关推荐等
+_ALWAYS_JUNK_RE = _name_re(
+    r'cookies?|consent|gdpr|newsletter|popup|promo|recommended|related|share|sharing|signup|social'
+    r'|sponsor(?:ed)?|subscribe|subscription'
+)
+# class 或 id 命中且不像正文容器时删除
+_LIKELY_JUNK_RE = _name_re(
+    r'ads?|advert\w*|header|banner|breadcrumbs?|crumbs?|catlinks|comments?|editsection|footer|masthead'
+    r'|menu|navbar|navbox|side-?bar|skip-link|toolbar'
+)
+# 驼峰式的 class 名（如 RelatedContent）按单词拆开再匹配
+_CAMEL_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_CONTENT_RE = re.compile(r'article|abstract|content|entry|main', re.IGNORECASE)
+_HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+# 正文容器至少要有的文本长度，不足时退回整个页面
+MIN_CONTENT_CHARS = 250
+# 链接文本占比超过该值的列表和表格视为导航
+MAX_LINK_DENSITY = 0.8
+
+def parse_html(body: bytes, encoding: Optional[str] = None, parser: Optional[str] = None) -> Any:
+    """
+    Parse an HTML document once, with lxml when it is installed.
+
+    Args:
+        body: Raw HTML bytes
+        encoding: Declared encoding, None to detect it from the content
+        parser: BeautifulSoup parser, defaults to HTML_PARSER
+
+    Returns:
+        BeautifulSoup of the document
+    """
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(body, parser or HTML_PARSER, from_encoding=encoding)
+
+def extract_main_content(soup: Any) -> Any:
+    """
+    Strip boilerplate from a parsed page and locate its main content.
+
+    Scripts, styles, navigation, sidebars, footers, cookie banners and similar
+    blocks are removed from the soup in place. The main content is then the
+    largest <article>, <main> or role="main" element, or the remaining page if
+    it has none.
+
+    Args:
+        soup: BeautifulSoup of the page, modified in place
+
+    Returns:
+        Element of the main content
+    """
+    _strip_boilerplate(soup)
+
+    best, best_length = None, 0
+    for candidate in _content_candidates(soup):
+        length = len(candidate.get_text(strip=True))
+        if length > best_length:
+            best, best_length = candidate, length
+    if best is not None and best_length >= MIN_CONTENT_CHARS:
+        return best
+    return soup.body or soup
+
+def html_to_markdown(soup: Any, main_content: bool = True) -> str:
+    """
+    Convert a parsed page to markdown without serializing and re-parsing it.
+
+    Args:
+        soup: BeautifulSoup of the page, modified in place when main_content is set
+        main_content: Whether to keep only the main content, see extract_main_content
+
+    Returns:
+        Markdown of the page
+    """
+    from markdownify import MarkdownConverter
+
+    converter = MarkdownConverter()
+    if not main_content:
+        return converter.convert_soup(soup)
+    content = extract_main_content(soup)
+    markdown = converter.convert_soup(content)
+    # 文章标题有时在正文容器之外，正文中没有任何大标题时补上页面的一级标题
+    title = soup.find('h1')
+    if title is not None and content.find(['h1', 'h2']) is None:
+        markdown = converter.convert_soup(title) + markdown
+    return markdown
+
+def _content_candidates(soup: Any) -> list:
+    return soup.find_all(['article', 'main']) + soup.find_all(attrs={'role': 'main'}) \
+        + soup.find_all(attrs={'itemprop': 'articleBody'})
+
+def _strip_boilerplate(soup: Any) -> None:
+    for tag in soup.find_all(_JUNK_TAGS):
+        tag.decompose()
+    # 正文容器内的元素
+    content = {id(tag) for candidate in _content_candidates(soup) for tag in candidate.descendants}
+    # 先收集再删除，避免遍历中修改树；已随祖先删除的节点 decomposed 为 True
+    junk = [tag for tag in soup.find_all(True) if _is_junk(tag, id(tag) in content)]
+    for tag in junk:
+        if not tag.decomposed:
+            tag.decompose()
+    # 导航菜单、相关链接等没有标记的链接列表
+    for tag in soup.find_all(['ul', 'ol', 'dl', 'table']):
+        if not tag.decomposed and _link_density(tag) > MAX_LINK_DENSITY:
+            tag.decompose()
+
+def _is_junk(tag: Any, in_content: bool) -> bool:
+    if tag.name in ('html', 'body'):
+        return False
+    if tag.has_attr('hidden') or tag.get('aria-hidden') == 'true':
+        return True
+    if tag.get('role') in _JUNK_ROLES:
+        return True
+    if tag.name in ('td', 'th', 'tr'):
+        # 表格单元格的 class 描述的是数据（如 arXiv 的 comments 栏），不是页面区块
+        return False
+    names = [_CAMEL_RE.sub('-', name) for name in tag.get('class') or []]
+    if tag.get('id'):
+        names.append(_CAMEL_RE.sub('-', tag['id']))
+    always = any(_ALWAYS_JUNK_RE.match(name) for name in names)
+    likely = not always and any(_LIKELY_JUNK_RE.match(name) for name in names) \
+        and not any(_CONTENT_RE.search(name) for name in names)
+    if not (always or likely or tag.name == 'header'):
+        return False
+    if in_content and (tag.name == 'section' or tag.find(_HEADING_TAGS) is not None):
+        # 正文容器中的章节（如 id="related-work"）不按 class 或 id 删除
+        return False
+    if always:
+        return True
+    # 包裹整个页面的容器也可能命中（如 class="flex-wrap-footer"），含有标题或正文的不删除
+    return tag.find(['h1', 'article', 'main']) is None
+
+def _link_density(tag: Any) -> float:
+    length = len(tag.get_text(strip=True))
+    if not length:
+        return 0.0
+    return sum(len(link.get_text(strip=True)) for link in tag.find_all('a')) / length
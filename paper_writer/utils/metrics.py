@@ -0,0 +1,213 @@
+import functools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Deque, Dict, Iterator, List, TextIO, Tuple
+
+# 指标名称前缀，用于 Prometheus 导出
+PREFIX = 'paper_writer'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_NULL_SPAN = nullcontext()
+
+class Metrics:
+    """
+    Thread-safe collector of timed spans and counters.
+
+    Disabled by default. While disabled, span() returns a shared no-op context
+    manager and incr() returns immediately, so instrumented code pays a single
+    attribute check.
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = 100000):
+        """
+        Initialize the collector.
+
+        Args:
+            enabled: Whether to record metrics
+            max_spans: Maximum number of individual spans kept for export, the
+                aggregated totals always cover every span
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=max_spans)
+        # (name, labels) -> [count, wall seconds, cpu seconds]
+        self._span_totals: Dict[Tuple[str, Labels], List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        self._counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def span(self, name: str, **labels: Any):
+        """
+        Time a block of code, recording its wall time and the CPU time of the calling thread.
+
+        Args:
+            name: Span name, e.g. "stage" or "llm_call"
+            **labels: Labels of the span, e.g. stage="outline_generator"
+
+        Returns:
+            Context manager timing the block
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, labels)
+
+    @contextmanager
+    def _span(self, name: str, labels: Dict[str, Any]) -> Iterator[None]:
+        start = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self._record(name, labels, start, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+
+    def record(self, name: str, duration: float, cpu: float, **labels: Any) -> None:
+        """
+        Record a span timed elsewhere, e.g. in a worker process.
+
+        Args:
+            name: Span name, e.g. "clean"
+            duration: Wall time of the span in seconds
+            cpu: CPU time of the span in seconds
+            **labels: Labels of the span
+        """
+        if not self.enabled:
+            return
+        self._record(name, labels, time.time() - duration, duration, cpu)
+
+    def _record(self, name: str, labels: Dict[str, Any], start: float, duration: float, cpu: float) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._spans.append({
+                'name': name,
+                'labels': dict(key[1]),
+                'start': start,
+                'duration': duration,
+                'cpu': cpu,
+            })
+            totals = self._span_totals[key]
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += cpu
+
+    def timed(self, name: str, **labels: Any) -> Callable:
+        """Decorator recording a span around every call of the function."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._span(name, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name: Counter name, e.g. "llm_prompt_tokens"
+            value: Amount to add
+            **labels: Labels of the counter, e.g. role="search"
+        """
+        if not self.enabled:
+            return
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] += value
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Recorded spans, oldest first."""
+        with self._lock:
+            return list(self._spans)
+
+    def counters(self) -> Dict[str, Dict[Labels, float]]:
+        """Counter values by name and labels."""
+        result: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                result[name][labels] = value
+        return dict(result)
+
+    def reset(self) -> None:
+        """Drop all recorded spans and counters."""
+        with self._lock:
+            self._spans.clear()
+            self._span_totals.clear()
+            self._counters.clear()
+
+    def write_jsonl(self, file: TextIO) -> None:
+        """
+        Write every recorded span and the counter totals as JSON lines.
+
+        Args:
+            file: Text file to write to
+        """
+        with self._lock:
+            spans = list(self._spans)
+            counters = list(self._counters.items())
+        for span in spans:
+            file.write(json.dumps({'type': 'span', **span}, ensure_ascii=False) + '\n')
+        for (name, labels), value in counters:
+            file.write(json.dumps(
+                {'type': 'counter', 'name': name, 'labels': dict(labels), 'value': value},
+                ensure_ascii=False
+            ) + '\n')
+
+    def to_prometheus(self) -> str:
+        """
+        Render the aggregated spans and counters in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            span_totals = sorted(self._span_totals.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        if span_totals:
+            for metric, index, help_text in (
+                ('span_seconds', 1, 'Wall time spent in spans'),
+                ('span_cpu_seconds', 2, 'CPU time of the calling thread spent in spans'),
+            ):
+                lines.append(f"# HELP {PREFIX}_{metric} {help_text}")
+                lines.append(f"# TYPE {PREFIX}_{metric} summary")
+                for (name, labels), totals in span_totals:
+                    label_text = self._format_labels((('span', name),) + labels)
+                    lines.append(f"{PREFIX}_{metric}_sum{label_text} {totals[index]}")
+                    lines.append(f"{PREFIX}_{metric}_count{label_text} {totals[0]}")
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            lines.append(f"{PREFIX}_{name}_total{self._format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    @staticmethod
+    def _format_labels(labels: Labels) -> str:
+        if not labels:
+            return ''
+        escaped = (
+            f'{key}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+            for key, value in labels
+        )
+        return '{' + ','.join(escaped) + '}'
+
+# 进程内共享的指标收集器
+metrics = Metrics()
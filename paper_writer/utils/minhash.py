@@ -0,0 +1,186 @@
+import re
+import zlib
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+
+# 中文按单字切分，其余按单词切分
+_TOKEN_RE = re.compile(r'[\u4e00-\u9fff]|\w+')
+
+# 组合相邻 token 哈希时使用的乘数（64 位奇数）
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# 每次计算的 shingle 行数，限制 (行数, num_perm) 中间矩阵的大小
+_BLOCK_ROWS = 2048
+
+class MinHasher:
+    """
+    Vectorized MinHash signatures of texts over word shingles.
+
+    Token hashes are combined into shingle hashes with NumPy, and every
+    permutation is a multiply-shift hash applied to all shingles at once.
+    Signatures are deterministic across processes for the same seed.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """
+        Initialize the hasher.
+
+        Args:
+            num_perm: Number of hash functions, i.e. the signature length
+            shingle_size: Number of consecutive tokens per shingle
+            seed: Seed of the hash functions
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # multiply-shift 哈希要求乘数为奇数
+        self._a = rng.integers(0, 2 ** 64, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 64, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """
+        Hash the word shingles of a text.
+
+        Args:
+            text: Text to hash
+
+        Returns:
+            Unique 64-bit shingle hashes, empty if the text has no tokens
+        """
+        tokens = _TOKEN_RE.findall(text.lower())
+        if not tokens:
+            return np.empty(0, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens), dtype=np.uint64, count=len(tokens))
+        # 短于一个 shingle 的文本整体作为一个 shingle
+        size = min(self.shingle_size, len(hashes))
+        count = len(hashes) - size + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(size):
+            shingles = shingles * _SHINGLE_MULTIPLIER + hashes[offset:offset + count]
+        return np.unique(shingles)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Text to hash
+
+        Returns:
+            Signature of num_perm 32-bit values, None if the text has no tokens
+        """
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(shingles), _BLOCK_ROWS):
+            block = shingles[start:start + _BLOCK_ROWS, None]
+            # uint64 运算按 2^64 取模，取高 32 位作为哈希值
+            hashed = (block * self._a + self._b) >> np.uint64(32)
+            np.minimum(signature, hashed.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two texts from their signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+class NearDuplicateIndex:
+    """
+    Order-preserving index of texts, clustering near-duplicates.
+
+    Two texts are near-duplicates when most word shingles of the shorter one
+    also occur in the other, so a landing page whose abstract is contained in
+    the full text clusters with it although their Jaccard similarity is low.
+    The containment is estimated from a consistent sample of the shingle
+    hashes, the same part of the hash space for every text, and candidates
+    are found through an inverted index of the samples, so adding a text does
+    not compare it with every text added before.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        hasher: Optional[MinHasher] = None,
+        sample_rate: int = 8,
+        min_samples: int = 4
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            threshold: Minimum estimated share of the shorter text's word shingles
+                that also occur in the other text for two texts to be near-duplicates
+            hasher: Hasher of the shingles, defaults to a MinHasher with 5-word shingles
+            sample_rate: About one in sample_rate shingles is kept in the sample
+            min_samples: Texts with fewer sampled shingles are too short to compare
+                and form their own clusters
+        """
+        if sample_rate < 1:
+            raise ValueError(f"sample_rate must be at least 1, got {sample_rate}")
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+        self.sample_rate = sample_rate
+        self.min_samples = min_samples
+        # 只保留哈希值落在前 1/sample_rate 区间内的 shingle，所有文本取同一区间
+        self._cutoff = np.uint64((2 ** 64 - 1) // sample_rate)
+        # 代表 -> 采样的 shingle 数，按加入顺序
+        self._sizes: Dict[Hashable, int] = {}
+        # 采样的 shingle -> 包含它的代表
+        self._postings: Dict[int, List[Hashable]] = {}
+        # 键 -> 所属簇的代表
+        self._representatives: Dict[Hashable, Hashable] = {}
+
+    def add(self, key: Hashable, text: str) -> Hashable:
+        """
+        Add a text to the index.
+
+        Args:
+            key: Key of the text, e.g. its position in a list
+            text: Text to add
+
+        Returns:
+            Key of the representative of the text's cluster: the first added
+            near-duplicate, or key itself if there is none
+        """
+        if key in self._representatives:
+            return self._representatives[key]
+        shingles = self.hasher.shingles(text)
+        sample = shingles[shingles <= self._cutoff].tolist()
+        if len(sample) < self.min_samples:
+            # 内容太少的文本无法可靠比较，各自成簇
+            self._representatives[key] = key
+            return key
+
+        hits: Dict[Hashable, int] = {}
+        for shingle in sample:
+            for candidate in self._postings.get(shingle, ()):
+                hits[candidate] = hits.get(candidate, 0) + 1
+
+        representative = key
+        # 按加入顺序检查，与多个代表相似时归入最先加入的一个
+        for candidate, size in self._sizes.items():
+            if candidate in hits and hits[candidate] >= self.threshold * min(size, len(sample)):
+                representative = candidate
+                break
+
+        self._representatives[key] = representative
+        if representative == key:
+            # 只为代表建立索引，簇内其他文本与代表相似
+            self._sizes[key] = len(sample)
+            for shingle in sample:
+                self._postings.setdefault(shingle, []).append(key)
+        return representative
+
+    def clusters(self) -> Dict[Hashable, List[Hashable]]:
+        """Keys of each cluster by representative, in order of addition."""
+        clusters: Dict[Hashable, List[Hashable]] = {}
+        for key, representative in self._representatives.items():
+            clusters.setdefault(representative, []).append(key)
+        return clusters
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._representatives
+
+    def __len__(self) -> int:
+        return len(self._representatives)
@@ -1,15 +1,40 @@
 import yaml
 import os
-from abc import ABC, abstractmethod
+import json
+from pathlib import Path
+import time
+import threading
 import requests
+from abc import ABC
+from contextlib import nullcontext
 from pydantic import BaseModel as PydanticBaseModel, Field
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from paper_writer.utils.env import env
+from paper_writer.utils.session import get_session
+from paper_writer.utils.cache import ResponseCache, get_response_cache
+from paper_writer.utils.metrics import metrics
+from paper_writer.utils.ratelimit import backoff_delay, get_circuit_breaker, get_token_bucket, parse_retry_after
+
+# Default models configuration in the project root
+DEFAULT_MODELS_PATH = Path(__file__).parent.parent.parent / 'models.yaml'
+
+# 可以重试的 HTTP 状态码
+RETRYABLE_STATUS = (408, 409, 425, 429, 500, 502, 503, 504)
+
+class ModelError(Exception):
+    """Raised when a model request fails or the response has no content."""
+
+class CircuitOpenError(ModelError):
+    """Raised without sending a request while the provider's circuit breaker is open."""
 
 class ModelConfig(PydanticBaseModel):
     model_name: str
     base_url: str
     model_api_key: str
+    cache: bool = Field(default=True, description="Whether responses of this model are cached")
+    cache_ttl: Optional[float] = Field(default=None, description="Cache time-to-live in seconds, None means no expiry")
+    rate_limit: float = Field(default=10, description="Maximum requests per second, lowered adaptively on 429s")
+    max_retries: int = Field(default=4, description="Retries of a request after throttling, 5xx errors or connection errors")
 
 class Message(PydanticBaseModel):
     role: str
@@ -18,95 +43,373 @@ class Message(PydanticBaseModel):
 class ChatRequest(PydanticBaseModel):
     model: str
     messages: List[Message]
+    stream: bool = False
+    # OpenAI 兼容接口只有在请求时才会在流的最后一个事件中返回 usage
+    stream_options: Optional[Dict[str, Any]] = None
+
+class ChatStream:
+    """
+    Iterator over the content chunks of a streamed chat completion.
+
+    Closing the stream before it is exhausted stops the generation and drops
+    the connection. Latencies are measured from the creation of the stream.
+    """
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._parts: List[str] = []
+        self._start = time.perf_counter()
+        # Seconds until the first content chunk and until the stream ended
+        self.first_token_latency: Optional[float] = None
+        self.total_latency: Optional[float] = None
+
+    @property
+    def text(self) -> str:
+        """Content received so far."""
+        return ''.join(self._parts)
+
+    def __iter__(self) -> "ChatStream":
+        return self
+
+    def __next__(self) -> str:
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._finish()
+            raise
+        if self.first_token_latency is None:
+            self.first_token_latency = time.perf_counter() - self._start
+        self._parts.append(chunk)
+        return chunk
+
+    def __enter__(self) -> "ChatStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the generation early."""
+        self._chunks.close()
+        self._finish()
+
+    def collect(self) -> str:
+        """Consume the rest of the stream and return the whole content."""
+        for _ in self:
+            pass
+        return self.text
+
+    def _finish(self) -> None:
+        if self.total_latency is None:
+            self.total_latency = time.perf_counter() - self._start
 
 class BaseModel(ABC):
-    def __init__(self, model_config: ModelConfig):
+    # (connect, read) timeout in seconds. Responses are streamed, so the read
+    # timeout bounds the gap between two chunks rather than the whole generation
+    timeout: Union[float, Tuple[float, float]] = (10, 120)
+    # Role of the model in the pipeline, used to label metrics
+    role: str = "model"
+
+    def __init__(
+        self,
+        model_config: ModelConfig,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[threading.Semaphore] = None
+    ):
+        """
+        Initialize the model client.
+
+        Args:
+            model_config: Model configuration
+            cache: Response cache, only used if caching is enabled for the model
+            limiter: Semaphore bounding the requests in flight, may be shared between models
+        """
         self.model_name = model_config.model_name
         self.base_url = model_config.base_url
         self.api_key = env[model_config.model_api_key]
-        
-    @abstractmethod
-    def query(self, prompt: str) -> str:
-        pass
+        # All models share one keep-alive connection pool
+        self.session = get_session("llm")
+        self.cache = cache if model_config.cache else None
+        self.cache_ttl = model_config.cache_ttl
+        self.limiter = limiter
+        self.max_retries = model_config.max_retries
+        self.bucket = get_token_bucket(self.base_url, self.model_name, model_config.rate_limit)
+        self.breaker = get_circuit_breaker(self.base_url)
 
-class SearchModel(BaseModel):
     def query(self, prompt: str) -> str:
+        """
+        Send a prompt to the chat completions endpoint and wait for the whole response.
+
+        Args:
+            prompt: User prompt
+
+        Returns:
+            Content of the model response
+        """
+        with self.stream(prompt) as stream:
+            return stream.collect()
+
+    def stream(self, prompt: str) -> ChatStream:
+        """
+        Send a prompt to the chat completions endpoint and stream the response
+        content as it is generated.
+
+        Responses are served from the response cache when one is configured
+        for this model. Only fully received responses are cached.
+
+        Args:
+            prompt: User prompt
+
+        Returns:
+            Stream of content chunks
+        """
+        return ChatStream(self._stream_chunks(prompt))
+
+    def _stream_chunks(self, prompt: str) -> Iterator[str]:
+        if self.cache is not None:
+            cached = self.cache.get(self.model_name, self.base_url, prompt)
+            if cached is not None:
+                metrics.incr('llm_cache_hits', role=self.role)
+                yield cached
+                return
+
+        parts = []
+        with self.limiter or nullcontext(), metrics.span('llm_call', role=self.role, model=self.model_name):
+            for chunk in self._post_chat_stream(prompt):
+                parts.append(chunk)
+                yield chunk
+
+        if self.cache is not None:
+            self.cache.set(self.model_name, self.base_url, prompt, ''.join(parts), ttl=self.cache_ttl)
+
+    async def aquery(self, prompt: str) -> str:
+        """
+        Async version of query, sharing the same connection pool.
+
+        Args:
+            prompt: User prompt
+
+        Returns:
+            Content of the model response
+        """
+        import asyncio
+
+        return await asyncio.to_thread(self.query, prompt)
+
+    def _post_chat(self, prompt: str, stream: bool = False) -> requests.Response:
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-        
+
         request = ChatRequest(
             model=self.model_name,
-            messages=[Message(role="user", content=prompt)]
+            messages=[Message(role="user", content=prompt)],
+            stream=stream,
+            stream_options={"include_usage": True} if stream else None
         )
-        
-        response = requests.post(
+
+        return self.session.post(
             f"{self.base_url}/chat/completions",
             headers=headers,
-            json=request.model_dump(),
-            timeout=30
+            json=request.model_dump(exclude_none=True),
+            timeout=self.timeout,
+            stream=stream
         )
-        
-        response_data = response.json()
-        content = response_data['choices'][0]['message']['content']
-        
+
+    def _post_chat_with_retries(self, prompt: str, stream: bool = False) -> requests.Response:
+        """
+        Send a chat request through the rate limiter and the circuit breaker.
+
+        Throttling (429), server errors and connection errors are retried with
+        jittered exponential backoff, waiting at least as long as Retry-After.
+
+        Returns:
+            A successful response
+
+        Raises:
+            CircuitOpenError: If the provider's circuit breaker is open
+            ModelError: If the request failed with a non-retryable status or ran out of retries
+        """
+        error = ""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                metrics.incr('llm_retries', role=self.role)
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker open for {self.base_url}, last error: {error}")
+            self.bucket.acquire()
+
+            retry_after = None
+            try:
+                response = self._post_chat(prompt, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.breaker.record_failure()
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code < 400:
+                    self.breaker.record_success()
+                    self.bucket.on_success()
+                    return response
+
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                response.close()
+                if response.status_code == 429:
+                    # 限流说明服务可用，只降低速率，不计入熔断
+                    metrics.incr('llm_throttled', role=self.role)
+                    self.bucket.on_throttled(retry_after)
+                    self.breaker.record_success()
+                elif response.status_code in RETRYABLE_STATUS:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                    raise ModelError(f"{self.model_name} request failed with {error}")
+
+            if attempt < self.max_retries:
+                time.sleep(max(retry_after or 0, backoff_delay(attempt)))
+
+        raise ModelError(f"{self.model_name} request failed after {self.max_retries + 1} attempts, last error: {error}")
+
+    def _post_chat_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yield content deltas from the server-sent events of a streamed completion.
+        Servers that ignore the stream flag and answer with plain JSON are handled too.
+        """
+        with self._post_chat_with_retries(prompt, stream=True) as response:
+            if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+                response_data = response.json()
+                self._record_usage(response_data)
+                yield self._extract_content(response_data)
+                return
+
+            # 除 choices 外的字段（如 citations、usage）可能只出现在最后几个事件中
+            extra: Dict[str, Any] = {}
+            # chunk_size=None 使数据块一到达就被处理，而不是攒满固定大小
+            try:
+                for line in response.iter_lines(chunk_size=None):
+                    if not line.startswith(b'data:'):
+                        continue
+                    data = line[len(b'data:'):].strip().decode('utf-8')
+                    if data == '[DONE]':
+                        break
+                    event = json.loads(data)
+                    if event.get('error'):
+                        raise ModelError(f"{self.model_name} stream failed: {event['error']}")
+                    extra.update((key, value) for key, value in event.items() if key != 'choices' and value)
+                    for choice in event.get('choices') or []:
+                        content = (choice.get('delta') or {}).get('content')
+                        if content:
+                            yield content
+            except requests.RequestException as e:
+                # 已经输出了部分内容，无法透明地重试
+                self.breaker.record_failure()
+                raise ModelError(f"{self.model_name} stream interrupted: {e}") from e
+
+            self._record_usage(extra)
+            suffix = self._content_suffix(extra)
+            if suffix:
+                yield suffix
+
+    def _record_usage(self, response_data: Dict[str, Any]) -> None:
+        usage = response_data.get('usage') or {}
+        metrics.incr('llm_calls', role=self.role)
+        metrics.incr('llm_prompt_tokens', usage.get('prompt_tokens') or 0, role=self.role)
+        metrics.incr('llm_completion_tokens', usage.get('completion_tokens') or 0, role=self.role)
+
+    def _extract_content(self, response_data: Dict[str, Any]) -> str:
+        try:
+            content = response_data['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            raise ModelError(f"{self.model_name} response has no content: {str(response_data)[:200]}")
+        return content + self._content_suffix(response_data)
+
+    def _content_suffix(self, response_data: Dict[str, Any]) -> str:
+        """Text appended after the message content, built from the other response fields."""
+        return ""
+
+class SearchModel(BaseModel):
+    timeout = 30
+    role = "search"
+    CITATIONS_PREFIX = "\n\nCitations: "
+
+    def _content_suffix(self, response_data: Dict[str, Any]) -> str:
         # Extract citations if they exist
         citations = response_data.get('citations', [])
         if citations:
             citation_text = ', '.join(citations)
-            content = f"{content}\n\nCitations: {citation_text}"
-            
-        return content
+            return f"{self.CITATIONS_PREFIX}{citation_text}"
+
+        return ""
+
+    @classmethod
+    def split_citations(cls, response: str) -> Tuple[str, List[str]]:
+        """
+        Split a response into its content and the citations field appended to it.
+
+        Args:
+            response: Response returned by query()
+
+        Returns:
+            Content and the list of cited URLs, empty if the response has no citations
+        """
+        content, separator, citations = response.rpartition(cls.CITATIONS_PREFIX)
+        if not separator:
+            return response, []
+        return content, [citation.strip() for citation in citations.split(', ') if citation.strip()]
 
 class SimpleModel(BaseModel):
-    def query(self, prompt: str) -> str:
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        request = ChatRequest(
-            model=self.model_name,
-            messages=[Message(role="user", content=prompt)]
-        )
-        
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=request.model_dump()
-        )
-        
-        return response.json()['choices'][0]['message']['content']
+    role = "simple"
 
 class ComplexModel(BaseModel):
-    def query(self, prompt: str) -> str:
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        request = ChatRequest(
-            model=self.model_name,
-            messages=[Message(role="user", content=prompt)]
-        )
-        
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=request.model_dump()
-        )
-        
-        return response.json()['choices'][0]['message']['content']
+    role = "complex"
+    # Reasoning models may think for minutes before sending content
+    timeout = (10, 300)
+
+def load_models(config_path: Optional[str] = None, max_concurrency: Optional[int] = None) -> Dict[str, BaseModel]:
+    """
+    Load the search, simple and complex models.
+
+    Args:
+        config_path: Path to the models configuration file, defaults to models.yaml in the project root
+        max_concurrency: Maximum number of requests in flight across all three
+            models, None means no limit
 
-def load_models() -> Dict[str, BaseModel]:
-    with open('models.yaml', 'r') as f:
+    Returns:
+        Models by role
+    """
+    if config_path is None:
+        config_path = DEFAULT_MODELS_PATH
+    with open(config_path, 'r') as f:
         config = yaml.safe_load(f)
-    
+
+    cache = get_response_cache()
+    limiter = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
     models = {
-        'search': SearchModel(ModelConfig(**config['search_model'])),
-        'simple': SimpleModel(ModelConfig(**config['simple_model'])),
-        'complex': ComplexModel(ModelConfig(**config['complex_model']))
+        'search': SearchModel(ModelConfig(**config['search_model']), cache=cache, limiter=limiter),
+        'simple': SimpleModel(ModelConfig(**config['simple_model']), cache=cache, limiter=limiter),
+        'complex': ComplexModel(ModelConfig(**config['complex_model']), cache=cache, limiter=limiter)
     }
 
     return models
+
+_registry: Dict[str, Dict[str, BaseModel]] = {}
+_registry_lock = threading.Lock()
+
+def get_models(config_path: Optional[str] = None) -> Dict[str, BaseModel]:
+    """
+    Get the process-wide models of a configuration file, loading them on first use.
+    Components share these clients instead of each reading models.yaml again.
+
+    Args:
+        config_path: Path to the models configuration file, defaults to models.yaml in the project root
+
+    Returns:
+        Models by role
+    """
+    key = str(Path(config_path or DEFAULT_MODELS_PATH).resolve())
+    with _registry_lock:
+        models = _registry.get(key)
+        if models is None:
+            models = load_models(key)
+            _registry[key] = models
+        return models
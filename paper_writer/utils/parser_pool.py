@@ -0,0 +1,191 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from paper_writer.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from paper_writer.utils.crawler import PageContent
+
+# (wall, CPU) seconds of each phase run in a worker, "parse" or "clean"
+Timings = Dict[str, Tuple[float, float]]
+
+class ParserPool:
+    """
+    Bounded process pool for the CPU-bound half of crawling: PDF and HTML
+    parsing, markdown conversion and text cleaning.
+
+    Raw bytes go in and markdown or cleaned text comes out, so large documents
+    are parsed on all cores instead of serializing on the GIL. Each document
+    runs under a CPU-time limit enforced with ITIMER_PROF in the worker; the
+    limit is not enforced on platforms without setitimer.
+
+    Workers are started with spawn, which imports the caller's main module
+    again in every worker. Scripts using the pool must therefore guard their
+    top-level code with if __name__ == "__main__".
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cpu_time_limit: Optional[float] = 30.0):
+        """
+        Initialize the parser pool. Worker processes are started on first use.
+
+        Args:
+            max_workers: Number of worker processes, defaults to the number of CPUs
+            cpu_time_limit: CPU seconds a single document may take, None for no limit
+        """
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.cpu_time_limit = cpu_time_limit
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def parse(
+        self,
+        url: str,
+        content_type: str,
+        body: bytes,
+        max_chars: Optional[int] = None,
+        clean: bool = False
+    ) -> "PageContent":
+        """
+        Parse a response in a worker process, see crawler.parse_content.
+
+        Args:
+            url: URL of the response
+            content_type: Content-Type of the response
+            body: Response body
+            max_chars: Character budget, PDF parsing stops once it is reached
+            clean: Whether to also clean the markdown into PageContent.clean_text
+
+        Returns:
+            Parsed content
+
+        Raises:
+            ParseTimeoutError: If parsing exceeded the CPU-time limit
+        """
+        return self._run(_parse, url, content_type, body, max_chars, clean, self.cpu_time_limit)
+
+    def clean(self, text: str) -> str:
+        """Clean a text with full_clean_pipeline in a worker process."""
+        return self._run(_clean, text, self.cpu_time_limit)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes. The pool starts new ones if used again."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, func: Callable, *args: Any) -> Any:
+        executor = self._get_executor()
+        try:
+            result, timings = executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            # 工作进程异常退出（如内存不足被杀）后整个进程池不可用，下次调用时重建
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        # 工作进程中的指标收集器未启用，清洗的耗时在这里按 full_clean_pipeline 的 clean 区间记录
+        if 'parse' in timings:
+            metrics.incr('parse_cpu_seconds', timings['parse'][1])
+        if 'clean' in timings:
+            metrics.record('clean', *timings['clean'])
+        return result
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # 调用方是多线程的，fork 会复制其他线程持有的锁，因此用 spawn 启动工作进程
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            return self._executor
+
+_default_pool: Optional[ParserPool] = None
+_default_lock = threading.Lock()
+
+def get_parser_pool() -> ParserPool:
+    """
+    Get the process-wide default parser pool.
+
+    The pool spawns worker processes on first use, so the calling script
+    needs an if __name__ == "__main__" guard.
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = ParserPool()
+        return _default_pool
+
+# 以下函数在工作进程中执行
+
+def _init_worker() -> None:
+    # 预先导入解析库，导入耗时不计入第一个文档的 CPU 时间限制
+    import bs4  # noqa: F401
+    import markdownify  # noqa: F401
+    import pdfminer.high_level  # noqa: F401
+    import pdfminer.layout  # noqa: F401
+    import paper_writer.utils.cleaner  # noqa: F401
+    import paper_writer.utils.crawler  # noqa: F401
+
+def _parse(
+    url: str,
+    content_type: str,
+    body: bytes,
+    max_chars: Optional[int],
+    clean: bool,
+    cpu_time_limit: Optional[float]
+) -> Tuple["PageContent", Timings]:
+    from paper_writer.utils.crawler import parse_content
+
+    def parse() -> Tuple["PageContent", Timings]:
+        timings: Timings = {}
+        page, timings['parse'] = _measure(lambda: parse_content(url, content_type, body, max_chars=max_chars))
+        if clean:
+            from paper_writer.utils.cleaner import full_clean_pipeline
+            clean_text, timings['clean'] = _measure(lambda: full_clean_pipeline(page.markdown))
+            page = page._replace(clean_text=clean_text)
+        return page, timings
+
+    return _limit_cpu_time(parse, cpu_time_limit, url)
+
+def _clean(text: str, cpu_time_limit: Optional[float]) -> Tuple[str, Timings]:
+    from paper_writer.utils.cleaner import full_clean_pipeline
+
+    def clean() -> Tuple[str, Timings]:
+        clean_text, timing = _measure(lambda: full_clean_pipeline(text))
+        return clean_text, {'clean': timing}
+
+    return _limit_cpu_time(clean, cpu_time_limit, 'text')
+
+def _measure(func: Callable[[], Any]) -> Tuple[Any, Tuple[float, float]]:
+    """Run func, returning its result and the (wall, CPU) seconds it took."""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = func()
+    return result, (time.perf_counter() - wall_start, time.process_time() - cpu_start)
+
+def _limit_cpu_time(func: Callable[[], Any], cpu_time_limit: Optional[float], what: str) -> Any:
+    """Run func under a CPU-time limit."""
+    from paper_writer.utils.crawler import ParseTimeoutError
+
+    def on_limit(signum, frame):
+        raise ParseTimeoutError(f"Parsing {what} exceeded the {cpu_time_limit}s CPU time limit")
+
+    limited = cpu_time_limit is not None and hasattr(signal, 'setitimer')
+    if limited:
+        # 每个工作进程同一时间只处理一个文档，进程的 CPU 时间即该文档的 CPU 时间
+        signal.signal(signal.SIGPROF, on_limit)
+        signal.setitimer(signal.ITIMER_PROF, cpu_time_limit)
+    try:
+        return func()
+    finally:
+        if limited:
+            signal.setitimer(signal.ITIMER_PROF, 0)
@@ -1,18 +1,22 @@
 import os
+import threading
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
+
+# prompts/ in the project root, independent of the working directory
+PROMPTS_DIR = Path(__file__).parent.parent.parent / 'prompts'
 
 class PromptLoader:
     """Load prompts from the prompts/ directory."""
     
-    def __init__(self, prompts_dir: str = "prompts"):
+    def __init__(self, prompts_dir: Optional[str] = None):
         """
         Initialize the prompt loader.
         
         Args:
-            prompts_dir: Path to the prompts directory
+            prompts_dir: Path to the prompts directory, defaults to prompts/ in the project root
         """
-        self.prompts_dir = Path(prompts_dir)
+        self.prompts_dir = Path(prompts_dir) if prompts_dir is not None else PROMPTS_DIR
         self.prompts: Dict[str, str] = {}
         self._load_prompts()
     
@@ -61,23 +65,40 @@ class PromptLoader:
         """Get a list of all available prompt names."""
         return list(self.prompts.keys())
 
-# Create a global instance
-prompt_loader = PromptLoader()
+_prompt_loader: Optional[PromptLoader] = None
+_prompt_loader_lock = threading.Lock()
+
+def get_prompt_loader() -> PromptLoader:
+    """Get the global prompt loader, reading the prompts on first use."""
+    global _prompt_loader
+    with _prompt_loader_lock:
+        if _prompt_loader is None:
+            _prompt_loader = PromptLoader()
+        return _prompt_loader
+
+# Individual variables for each prompt, resolved on first access
+_PROMPT_VARIABLES = {
+    'DESCRIPTION_PROMPT': 'description',
+    'OUTLINE_PROMPT': 'outline',
+    'SEARCHER_PROMPT': 'searcher',
+}
 
-# Create individual variables for each prompt
-DESCRIPTION_PROMPT = prompt_loader.get_prompt("description")
-OUTLINE_PROMPT = prompt_loader.get_prompt("outline")
-SEARCHER_PROMPT = prompt_loader.get_prompt("searcher")
+def __getattr__(name: str):
+    if name == 'prompt_loader':
+        return get_prompt_loader()
+    if name in _PROMPT_VARIABLES:
+        return get_prompt_loader().get_prompt(_PROMPT_VARIABLES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Convenience functions
 def get_prompt(name: str) -> str:
     """Get a prompt by name."""
-    return prompt_loader.get_prompt(name)
+    return get_prompt_loader().get_prompt(name)
 
 def format_prompt(name: str, **kwargs) -> str:
     """Format a prompt with parameters."""
-    return prompt_loader.format_prompt(name, **kwargs)
+    return get_prompt_loader().format_prompt(name, **kwargs)
 
 def list_prompts() -> list:
     """List all available prompts."""
-    return prompt_loader.list_prompts()
+    return get_prompt_loader().list_prompts()
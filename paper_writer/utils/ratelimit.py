@@ -0,0 +1,163 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose rate adapts to the provider.
+
+    The rate is halved when the provider throttles (AIMD), at most once per
+    second so that a burst of 429s from requests already in flight counts as
+    one signal, and grows back additively with every success. A Retry-After
+    pause blocks every caller until it has passed.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: float = 0.1):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Maximum sustained requests per second
+            burst: Maximum number of requests sent back to back, defaults to rate
+            min_rate: Lower bound of the adapted rate
+        """
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._blocked_until:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self._blocked_until - now
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        """Additive increase after a successful request."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        """
+        Multiplicative decrease after the provider throttled a request.
+
+        Args:
+            retry_after: Seconds the provider asked to wait before the next request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now - self._last_decrease >= 1:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._last_decrease = now
+            self.tokens = min(self.tokens, 0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+                self._updated = max(self._updated, self._blocked_until)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+class CircuitBreaker:
+    """
+    Fail fast while a provider is down.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected for reset_timeout seconds. Then a single probe is let
+    through: its success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # 只放行一个探测请求
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter, so that concurrent retries spread out."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+def get_token_bucket(base_url: str, model_name: str, rate: float) -> TokenBucket:
+    """Get the process-wide token bucket of a model at a provider."""
+    with _lock:
+        bucket = _buckets.get((base_url, model_name))
+        if bucket is None:
+            bucket = TokenBucket(rate)
+            _buckets[(base_url, model_name)] = bucket
+        return bucket
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    """Get the process-wide circuit breaker of a provider."""
+    with _lock:
+        breaker = _breakers.get(base_url)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[base_url] = breaker
+        return breaker
@@ -0,0 +1,48 @@
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 32
+
+_sessions: Dict[str, requests.Session] = {}
+_lock = threading.Lock()
+
+
+def get_session(name: str = "default", pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Get a process-wide pooled HTTP session.
+
+    Sessions are shared per name, so every caller using the same name reuses
+    the same keep-alive connection pool instead of opening a new TCP/TLS
+    connection per request.
+
+    Args:
+        name: Name of the shared session (e.g. "llm", "crawler")
+        pool_size: Maximum number of pooled connections per host
+
+    Returns:
+        The shared requests.Session
+    """
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[name] = session
+        return session
+
+
+def close_sessions() -> None:
+    """Close all shared sessions and drop their pooled connections."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,37 @@
+import re
+
+# 中日韩字符大约每个字符一个 token，其余文本大约每 4 个字符一个 token
+_CJK_RE = re.compile(r'[\u3000-\u30ff\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of tokens of a text without a tokenizer.
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Estimated token count
+    """
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text to roughly max_tokens estimated tokens.
+
+    Args:
+        text: Text to cut
+        max_tokens: Maximum estimated token count
+
+    Returns:
+        The text, or a prefix of it whose estimate is within max_tokens
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    # 按估计值的比例截断；中日韩字符分布不均时再截断一次
+    text = text[:len(text) * max(0, max_tokens) // tokens]
+    while estimate_tokens(text) > max_tokens and text:
+        text = text[:len(text) * 9 // 10]
+    return text
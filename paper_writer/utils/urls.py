@@ -0,0 +1,137 @@
+import re
+from typing import Dict, Iterable, Iterator, List
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+# 匹配到空白、引号、括号类分隔符或中文标点为止，端口和查询参数都包含在内
+URL_RE = re.compile(r"https?://[^\s<>\"'`\[\]{}|\\^，。；：！？、（）《》【】]+")
+
+# URL 末尾的标点通常属于句子而不是 URL
+_TRAILING_PUNCTUATION = '.,;:!?*'
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref_src', 'ref_url', 'spm', 'scm', '_ga', '_gl',
+})
+_TRACKING_PREFIXES = ('utm_',)
+
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+_ARXIV_HOSTS = ('arxiv.org', 'www.arxiv.org', 'export.arxiv.org')
+# 新式编号 2101.01234v2 和旧式编号 cs/0112017v1
+_ARXIV_PATH_RE = re.compile(
+    r'^/(?:abs|pdf|html)/((?:\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?)(?:\.pdf)?/?$'
+)
+_DOI_HOSTS = ('doi.org', 'dx.doi.org', 'www.doi.org')
+
+def extract_urls(text: str) -> List[str]:
+    """
+    Extract http(s) URLs from text in a single linear pass.
+
+    Args:
+        text: Text to search
+
+    Returns:
+        URLs in order of appearance, trailing sentence punctuation removed
+    """
+    if not text:
+        return []
+    urls = []
+    for match in URL_RE.finditer(text):
+        url = _strip_trailing(match.group(0))
+        if urlsplit(url).netloc:
+            urls.append(url)
+    return urls
+
+def _strip_trailing(url: str) -> str:
+    while url:
+        if url[-1] in _TRAILING_PUNCTUATION:
+            url = url[:-1]
+        # 只去掉不成对的右括号，保留 Wikipedia 等 URL 中成对的括号
+        elif url[-1] == ')' and url.count(')') > url.count('('):
+            url = url[:-1]
+        else:
+            break
+    return url
+
+def clean_url(url: str) -> str:
+    """
+    Normalize a URL without changing the page it points to: lowercase the scheme
+    and host, drop default ports, fragments and tracking parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = parts.netloc.lower()
+    default_port = _DEFAULT_PORTS.get(scheme)
+    if default_port and host.endswith(f":{default_port}"):
+        host = host[:-len(default_port) - 1]
+    query = parts.query
+    params = parse_qsl(query, keep_blank_values=True)
+    kept = [
+        (key, value) for key, value in params
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(_TRACKING_PREFIXES)
+    ]
+    # 没有跟踪参数时保留原始查询串，避免改变其编码
+    if len(kept) != len(params):
+        query = urlencode(kept)
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+def url_key(url: str) -> str:
+    """
+    Canonical key of a URL, equal for URLs that point to the same document.
+    arXiv abs/pdf pages share the arXiv id and doi.org links share the DOI.
+    """
+    cleaned = clean_url(url)
+    parts = urlsplit(cleaned)
+    host = parts.hostname or ''
+
+    if host in _ARXIV_HOSTS:
+        match = _ARXIV_PATH_RE.match(parts.path)
+        if match:
+            return f"arxiv:{match.group(1)}"
+    if host in _DOI_HOSTS and parts.path.startswith('/10.'):
+        # DOI 不区分大小写
+        return f"doi:{unquote(parts.path[1:]).lower()}"
+
+    # 其余 URL 忽略 scheme，并把 "/a/" 和 "/a" 视为同一页面
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('', parts.netloc, path, parts.query, ''))
+
+class UrlIndex:
+    """Order-preserving index of URLs, collapsing URLs that share a canonical key."""
+
+    def __init__(self, urls: Iterable[str] = ()):
+        # 规范键 -> 最先出现的清理后的 URL
+        self._urls: Dict[str, str] = {}
+        for url in urls:
+            self.add(url)
+
+    def add(self, url: str) -> str:
+        """
+        Add a URL to the index.
+
+        Args:
+            url: URL to add
+
+        Returns:
+            The URL to crawl for it, i.e. the first added URL with the same canonical key
+        """
+        return self._urls.setdefault(url_key(url), clean_url(url))
+
+    def get(self, url: str) -> str:
+        """Get the URL to crawl for a URL that was added before."""
+        return self._urls[url_key(url)]
+
+    @property
+    def urls(self) -> List[str]:
+        """Unique URLs to crawl, in order of first appearance."""
+        return list(self._urls.values())
+
+    def __contains__(self, url: str) -> bool:
+        return url_key(url) in self._urls
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._urls.values())
+
+    def __len__(self) -> int:
+        return len(self._urls)